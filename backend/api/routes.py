@@ -1,18 +1,27 @@
-from flask import Blueprint, jsonify, Response, request
-from backend.detection.motion_detector import MotionDetector
-from backend.detection.colors import COLOR_GREEN, COLOR_WHITE, COLOR_BLUE
+from flask import Blueprint, jsonify, Response, request, abort, json, stream_with_context
+from backend.detection.motion_detector import MotionDetector, describe_layout
+from backend.detection.status_feed import StatusFeed
+from backend.detection.status_snapshot import StatusSnapshot, BINARY_HEADER
+from backend.video.runner import DetectionRunner
+from backend.video.broadcast import FrameBroadcaster, mjpeg_stream, MJPEG_BOUNDARY
+from backend.video.encoder import JpegEncoder
 import yaml
-import cv2
 import threading
+import collections
+import csv
+import io
 import base64
-import time
+import hashlib
 import os
-from datetime import datetime
+from datetime import datetime, timedelta
 from ..models import db, VehicleEntry
 from backend.config import Config
 import win32print
 import win32ui
 from ..services.printer import PrinterService
+from ..services.camera_service import CameraManager, load_cameras
+from ..services.history import history_writer
+from ..services.rollups import GRANULARITIES, pick_granularity, occupancy_report
 
 api = Blueprint('api', __name__)
 printer_service = PrinterService()
@@ -21,15 +30,39 @@ printer_service = PrinterService()
 detector = None
 detection_thread = None
 is_detecting = False
-current_frame = None
-current_status = None
+runner = None
+camera_manager = None
+jpeg_encoder = JpegEncoder(
+    quality=Config.JPEG_QUALITY,
+    widths=Config.JPEG_WIDTHS,
+    qualities=Config.JPEG_QUALITIES,
+    workers=Config.JPEG_ENCODE_WORKERS
+)
+frame_broadcaster = FrameBroadcaster(jpeg_encoder)
+# Frame seqs start again at 0 with every server run; this tells the runs apart
+frame_epoch = os.urandom(4).hex()
+status_feed = None
+spot_layout = None
+layout_body = None
+# Published until the first status arrives from a camera worker
+initial_snapshot = None
+# Callables run with every new status delta (e.g. the Socket.IO broadcaster)
+status_listeners = []
+# Encoded SSE messages by delta seq, shared by every /events subscriber
+sse_cache = collections.OrderedDict()
+sse_cache_lock = threading.Lock()
+
+def default_camera_points():
+    """Coordinates data of the default camera, whose spots the status endpoints describe"""
+    camera = load_cameras(Config)[Config.DEFAULT_CAMERA]
+    with open(camera['coordinates'], "r") as data:
+        return yaml.load(data, Loader=yaml.SafeLoader)
 
 def init_detector():
     global detector
     if detector is None:
         base_dir = os.path.dirname(os.path.dirname(os.path.dirname(__file__)))
-        data_file = os.path.join(base_dir, "data", "coordinates_1.yml")
-        
+
         # Get video source from config
         video_source = Config.VIDEO_SOURCE
         
@@ -40,191 +73,588 @@ def init_detector():
             video_source = os.path.join(base_dir, "videos", Config.VIDEO_PATH)
             print(f"Loading video file: {video_source}")
         
-        with open(data_file, "r") as data:
-            points = yaml.load(data, Loader=yaml.SafeLoader)
-            detector = MotionDetector(video_source, points, Config.START_FRAME)
+        detector = MotionDetector(video_source, default_camera_points(), Config.START_FRAME)
     return detector
 
+def get_spot_layout():
+    """Static layout of the default camera (see MotionDetector.get_layout)"""
+    global spot_layout
+    if spot_layout is None:
+        if Config.DETECTION_MODE == 'process':
+            # The detector lives in the camera worker; the coordinates file is all we need
+            points = default_camera_points()
+            spot_layout = describe_layout(points['spots'], points['frame_dimensions'])
+        else:
+            spot_layout = init_detector().get_layout()
+    return spot_layout
+
+def get_status_feed():
+    global status_feed
+    if status_feed is None:
+        layout = get_spot_layout()
+        status_feed = StatusFeed(layout['ids'], layout, history=Config.STATUS_HISTORY)
+    return status_feed
+
+def publish_frame(packet):
+    if 'status' in packet:
+        delta = get_status_feed().update(packet['statuses'], packet['captured_at'])
+        if delta is not None:
+            for listener in status_listeners:
+                listener(delta)
+    # Rendered but not encoded: JPEGs are made only when someone asks for one
+    frame_broadcaster.publish(packet['frame'], packet.get('status'))
+
+def publish_detector_frame(packet):
+    """Output of the in-process runner: kept in the history, then published"""
+    if 'status' in packet:
+        history_writer.record(Config.DEFAULT_CAMERA, detector.layout.ids, packet['status'])
+    publish_frame(packet)
+
+def record_camera_history(camera, message):
+    if message.get('status') is not None:
+        history_writer.record(camera.id, camera.spot_ids, message['status'])
+
+def publish_camera_frame(camera, message):
+    """Feed frames of a CameraManager worker into the same path as the in-process runner"""
+    frame = camera.ring.copy(message['ring_seq'])
+    if frame is None:
+        return
+    packet = {'captured_at': message['captured_at'], 'frame': frame}
+    if message.get('status') is not None:
+        packet['status'] = message['status']
+        packet['statuses'] = message['status'].statuses
+    publish_frame(packet)
+
+def published_snapshot():
+    """Latest published StatusSnapshot, whichever way detection runs"""
+    global initial_snapshot
+    _, _, status = frame_broadcaster.snapshot()
+    if status is not None:
+        return status
+    if Config.DETECTION_MODE != 'process':
+        return init_detector().snapshot
+    if initial_snapshot is None:
+        # What a fresh detector publishes: no frame yet, every spot not available
+        initial_snapshot = StatusSnapshot(0, 0, None, [False] * get_spot_layout()['total_spaces'])
+    return initial_snapshot
+
+def mjpeg_response(next_frame, should_run):
+    return Response(
+        mjpeg_stream(next_frame, should_run),
+        mimetype=f'multipart/x-mixed-replace; boundary={MJPEG_BOUNDARY}',
+        headers={'Cache-Control': 'no-cache, no-store', 'X-Accel-Buffering': 'no'}
+    )
+
 def detection_loop():
-    global is_detecting, current_frame, current_status
+    global is_detecting, runner
     try:
         detector = init_detector()
-        video_source = Config.VIDEO_SOURCE
-
-        print(f"Starting video capture from: {video_source}")
-        cap = cv2.VideoCapture(video_source)
-        
-        if not cap.isOpened():
-            print(f"Error: Could not open video source: {video_source}")
+        runner = DetectionRunner(
+            detector,
+            Config.VIDEO_SOURCE,
+            publish_detector_frame,
+            start_frame=Config.START_FRAME,
+            workers=Config.PIPELINE_WORKERS,
+            queue_size=Config.PIPELINE_QUEUE_SIZE
+        )
+        try:
+            runner.start()
+        except IOError as e:
+            print(f"Error: {e}")
             return
 
-        # Use original dimensions from when parking spaces were marked
-        original_dimensions = detector.original_dimensions
-        target_width = original_dimensions['width']
-        target_height = original_dimensions['height']
-        
-        # Optimize settings based on source type
-        if video_source.startswith('rtsp://'):
-            cap.set(cv2.CAP_PROP_BUFFERSIZE, 1)
-            cap.set(cv2.CAP_PROP_FOURCC, cv2.VideoWriter_fourcc('H', '2', '6', '4'))
-            cap.set(cv2.CAP_PROP_FRAME_WIDTH, target_width)
-            cap.set(cv2.CAP_PROP_FRAME_HEIGHT, target_height)
-        else:
-            cap.set(cv2.CAP_PROP_POS_FRAMES, Config.START_FRAME)
-            cap.set(cv2.CAP_PROP_BUFFERSIZE, 3)
-        
-        fps = cap.get(cv2.CAP_PROP_FPS)
-        frame_delay = 1.0 / 30  # Lock to 30 FPS
-        
-        frame_count = 0
-        last_time = time.time()
-        detection_interval = 3  # Process every 3rd frame for detection
-        encode_params = [
-            int(cv2.IMWRITE_JPEG_QUALITY), 85,
-            int(cv2.IMWRITE_JPEG_OPTIMIZE), 1
-        ]
-
-        while is_detecting:
-            try:
-                current_time = time.time()
-                elapsed = current_time - last_time
-                
-                if elapsed < frame_delay:
-                    time.sleep(max(0, frame_delay - elapsed))
-                    continue
-
-                success, frame = cap.read()
-                if not success:
-                    print("Failed to read frame, retrying...")
-                    if video_source.startswith('rtsp://'):
-                        cap.release()
-                        time.sleep(1)
-                        cap = cv2.VideoCapture(video_source)
-                        if not cap.isOpened():
-                            print("Failed to reconnect to RTSP stream")
-                            break
-                    else:
-                        cap.set(cv2.CAP_PROP_POS_FRAMES, Config.START_FRAME)
-                    continue
-
-                # Resize frame to match original dimensions from parking space picker
-                current_height, current_width = frame.shape[:2]
-                if current_width != target_width or current_height != target_height:
-                    frame = cv2.resize(
-                        frame, 
-                        (target_width, target_height),
-                        interpolation=cv2.INTER_AREA
-                    )
-
-                # Process detection at specified intervals
-                if frame_count % detection_interval == 0:
-                    # Create a copy for detection to avoid modifying the display frame
-                    detection_frame = frame.copy()
-                    spaces_status = detector.process_frame(detection_frame)
-                    
-                    # Get complete status
-                    current_status = detector.get_current_status()
-
-                # Draw parking space markers on the frame
-                frame_with_markers = frame.copy()
-                for idx, p in enumerate(detector.coordinates_data):
-                    coordinates = detector._coordinates(p)
-                    # Green if available, Blue if occupied
-                    color = COLOR_GREEN if detector.statuses[idx] else COLOR_BLUE
-                    cv2.drawContours(frame_with_markers, [coordinates], -1, color, 2)
-                    moments = cv2.moments(coordinates)
-                    if moments["m00"] != 0:  # Avoid division by zero
-                        center = (
-                            int(moments["m10"] / moments["m00"]),
-                            int(moments["m01"] / moments["m00"])
-                        )
-                        cv2.putText(
-                            frame_with_markers,
-                            str(p["id"]),
-                            center,
-                            cv2.FONT_HERSHEY_SIMPLEX,
-                            0.5,
-                            COLOR_WHITE,
-                            2
-                        )
-
-                # Convert frame to base64 efficiently
-                _, buffer = cv2.imencode('.jpg', frame_with_markers, encode_params)
-                frame_base64 = base64.b64encode(buffer).decode('utf-8')
-                
-                if current_status:
-                    current_status['frame'] = frame_base64
-                else:
-                    current_status = {'frame': frame_base64}
-                
-                frame_count += 1
-                if frame_count % 100 == 0:
-                    print(f"Processed {frame_count} frames, FPS: {1.0/elapsed:.2f}")
-                
-                last_time = current_time
-
-            except Exception as e:
-                print(f"Error processing frame: {e}")
-                time.sleep(0.1)
+        runner.run(lambda: is_detecting)
 
     except Exception as e:
         print(f"Detection loop error: {e}")
     finally:
-        if 'cap' in locals():
-            cap.release()
+        if runner is not None:
+            runner.stop()
         print("Detection stopped")
 
+def get_camera_manager():
+    global camera_manager
+    if camera_manager is None:
+        camera_manager = CameraManager(
+            load_cameras(Config),
+            workers=Config.PIPELINE_WORKERS,
+            queue_size=Config.PIPELINE_QUEUE_SIZE,
+            encoder=jpeg_encoder
+        )
+        # Every camera's transitions go to the history, whichever way it was started
+        for worker in camera_manager.workers.values():
+            worker.listeners.append(record_camera_history)
+    return camera_manager
+
+def requested_tier():
+    """(width, quality) asked for with ?w= and ?q=, None meaning the default"""
+    return request.args.get('w', type=int), request.args.get('q', type=int)
+
+def get_camera(camera_id):
+    try:
+        return get_camera_manager().get(camera_id)
+    except KeyError:
+        abort(404, description=f"Unknown camera: {camera_id}")
+
+def frame_etag(seq):
+    return f'frame-{frame_epoch}-{seq}'
+
+def not_modified(seq):
+    response = Response(status=304)
+    response.set_etag(frame_etag(seq))
+    return response
+
+def build_frame_body(seq, frame, status, tier):
+    data = status.as_dict() if status is not None else {}
+    data['seq'] = seq
+    data['epoch'] = frame_epoch
+    if tier is not None:
+        jpeg = frame_broadcaster.jpeg(seq, frame, *tier)
+        data['frame'] = base64.b64encode(jpeg).decode('utf-8')
+    return json.dumps(data)
+
 @api.route('/frame')
 def get_frame():
-    if current_status:
-        return jsonify(current_status)
-    return jsonify({'error': 'No frame available'}), 404
+    """Latest frame and status.
+
+    ``?since=<seq>&epoch=<epoch>`` long-polls: it waits up to ``timeout``
+    seconds (default FRAME_LONG_POLL_TIMEOUT) for a frame newer than `seq`
+    and answers 304 if none arrives. A `seq` from an earlier server run (a
+    different epoch, or ahead of the current seq) gets the latest frame
+    straight away. A matching If-None-Match answers 304 straight away.
+    ``?frame=0`` leaves the JPEG out, for clients that watch /stream;
+    ``?w=&q=`` pick a smaller/lower quality JPEG tier.
+    """
+    since = request.args.get('since', type=int)
+    if since is not None:
+        timeout = request.args.get('timeout', Config.FRAME_LONG_POLL_TIMEOUT, type=float)
+        timeout = min(max(timeout, 0.0), Config.FRAME_LONG_POLL_MAX)
+        # A seq from another server run, or ahead of this one's, gets the latest frame at once
+        same_run = request.args.get('epoch', frame_epoch) == frame_epoch
+        if same_run and frame_broadcaster.latest()[0] == since:
+            if timeout <= 0 or frame_broadcaster.wait(since, timeout) is None:
+                return not_modified(since)
+
+    seq, frame, status = frame_broadcaster.snapshot()
+    if frame is None:
+        return jsonify({'error': 'No frame available'}), 404
+    if since is None and request.if_none_match.contains(frame_etag(seq)):
+        return not_modified(seq)
+
+    tier = jpeg_encoder.tier(*requested_tier()) if request.args.get('frame') != '0' else None
+    body = frame_broadcaster.cached(
+        seq, ('body', tier), lambda: build_frame_body(seq, frame, status, tier))
+    response = Response(body, mimetype='application/json')
+    response.set_etag(frame_etag(seq))
+    response.headers['Cache-Control'] = 'no-cache'
+    return response
+
+@api.route('/stream')
+def stream():
+    """MJPEG stream of the detection feed; slow viewers skip frames"""
+    width, quality = requested_tier()
+    return mjpeg_response(
+        lambda last_seq: frame_broadcaster.wait_jpeg(last_seq, 1.0, width, quality),
+        lambda: is_detecting
+    )
+
+def format_sse(event, data, event_id=None):
+    lines = []
+    if event_id is not None:
+        lines.append(f'id: {event_id}')
+    lines.append(f'event: {event}')
+    lines.append(f'data: {json.dumps(data)}')
+    return '\n'.join(lines) + '\n\n'
+
+def transition_event(delta):
+    """SSE message for a status delta, encoded once for all subscribers"""
+    seq = delta['seq']
+    with sse_cache_lock:
+        message = sse_cache.get(seq)
+    if message is not None:
+        return message
+
+    message = format_sse('transitions', {
+        'seq': seq,
+        'ts': delta['ts'],
+        'transitions': [
+            {'spot': spot_id, 'state': 'vacated' if available else 'occupied'}
+            for spot_id, available in delta['changes']
+        ],
+        'available_spaces': delta['available_spaces'],
+        'occupied_spaces': delta['occupied_spaces']
+    }, seq)
+    with sse_cache_lock:
+        sse_cache[seq] = message
+        while len(sse_cache) > Config.STATUS_HISTORY:
+            sse_cache.popitem(last=False)
+    return message
+
+def transition_stream(feed, last_id):
+    # Without a usable Last-Event-ID the subscriber starts from a full snapshot
+    seq = last_id if last_id is not None else -1
+    yield 'retry: 3000\n\n'
+    while True:
+        deltas = feed.since(seq) if seq >= 0 else None
+        if deltas is None:
+            snapshot = feed.snapshot()
+            seq = snapshot['seq']
+            yield format_sse('snapshot', snapshot, seq)
+            continue
+
+        for delta in deltas:
+            seq = delta['seq']
+            yield transition_event(delta)
+
+        if not feed.wait(seq, Config.SSE_KEEPALIVE):
+            # Comment line: keeps proxies from closing the connection and
+            # lets us notice subscribers that went away
+            yield ': keepalive\n\n'
+
+@api.route('/events')
+def stream_events():
+    """Server-Sent Events stream of spot occupied/vacated transitions.
+
+    Each message carries the delta seq as its id, so a reconnecting client
+    (Last-Event-ID) gets exactly the transitions it missed while they are
+    still buffered, and a fresh snapshot otherwise.
+    """
+    feed = get_status_feed()
+    last_id = request.headers.get('Last-Event-ID', request.args.get('last_event_id'))
+    try:
+        last_id = int(last_id) if last_id is not None else None
+    except ValueError:
+        last_id = None
+    return Response(
+        transition_stream(feed, last_id),
+        mimetype='text/event-stream',
+        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'}
+    )
+
+def parking_status_body(snapshot):
+    return json.dumps({
+        "status": "success",
+        "data": {
+            "total_spaces": snapshot.total_spaces,
+            "available_spaces": snapshot.available_spaces,
+            "occupied_spaces": snapshot.occupied_spaces,
+            "spaces": snapshot.as_dict()
+        }
+    })
 
 @api.route('/parking-status')
 def get_parking_status():
+    # One consistent snapshot, serialized once no matter how many clients ask
+    snapshot = published_snapshot()
+    body = snapshot.memo('parking-status', lambda: parking_status_body(snapshot))
+    return Response(body, mimetype='application/json')
+
+def binary_status_response(snapshot, tag):
+    """Packed occupancy bitset of `snapshot` (see status_snapshot.BINARY_HEADER)"""
+    body = snapshot.to_bytes()
+    # Taken from the bitset itself, so it stays right across detector restarts;
+    # weak because the seq/timestamp in the header move on while the spots don't
+    digest = snapshot.memo('bitset-md5', lambda: hashlib.md5(body[BINARY_HEADER.size:]).hexdigest())
+    etag = f'{tag}-{snapshot.total_spaces}-{digest}'
+    if request.if_none_match.contains_weak(etag):
+        response = Response(status=304)
+    else:
+        response = Response(body, mimetype='application/octet-stream')
+    response.set_etag(etag, weak=True)
+    response.headers['Cache-Control'] = 'no-cache'
+    return response
+
+@api.route('/parking-status.bin')
+def get_parking_status_binary():
+    return binary_status_response(published_snapshot(), 'status')
+
+@api.route('/layout')
+def get_layout():
+    """Spot ids, coordinates and frame dimensions; fetch once, not per status"""
+    global layout_body
+    if layout_body is None:
+        layout_body = json.dumps(get_spot_layout())
+    response = Response(layout_body, mimetype='application/json')
+    response.set_etag(hashlib.md5(layout_body.encode()).hexdigest())
+    response.headers['Cache-Control'] = 'public, max-age=300'
+    return response.make_conditional(request)
+
+@api.route('/detection-stats')
+def get_detection_stats():
+    if Config.DETECTION_MODE == 'process':
+        # Reported by the worker process about once a second
+        return jsonify({
+            "status": "success",
+            "data": {**detection_camera().stats, "history": history_writer.stats()}
+        })
     detector = init_detector()
     return jsonify({
         "status": "success",
         "data": {
-            "total_spaces": detector.total_spaces,
-            "available_spaces": detector.free_spaces,
-            "occupied_spaces": detector.occupied_spaces,
-            "spaces": detector.get_current_status()
+            "gate": detector.gate.stats(),
+            "history": history_writer.stats(),
+            **(runner.stats() if runner else {})
         }
     })
 
+def detection_camera():
+    camera = get_camera_manager().get(Config.DEFAULT_CAMERA)
+    if publish_camera_frame not in camera.listeners:
+        camera.listeners.append(publish_camera_frame)
+    return camera
+
 @api.route('/start-detection')
 def start_detection():
     global detection_thread, is_detecting
     if not is_detecting:
         is_detecting = True
-        detection_thread = threading.Thread(target=detection_loop)
-        detection_thread.start()
+        if Config.DETECTION_MODE == 'process':
+            detection_camera().start()
+        else:
+            detection_thread = threading.Thread(target=detection_loop)
+            detection_thread.start()
     return jsonify({"status": "success", "message": "Detection started"})
 
 @api.route('/stop-detection')
 def stop_detection():
     global is_detecting
     is_detecting = False
-    if detection_thread:
+    if Config.DETECTION_MODE == 'process':
+        detection_camera().stop()
+    elif detection_thread:
         detection_thread.join()
     return jsonify({"status": "success", "message": "Detection stopped"})
 
-@api.route('/vehicle-entries', methods=['GET'])
-def get_entries():
-    entries = VehicleEntry.query.order_by(VehicleEntry.created_at.desc()).all()
-    return jsonify([{
+@api.route('/cameras')
+def list_cameras():
+    return jsonify({"status": "success", "data": get_camera_manager().list()})
+
+@api.route('/cameras/<camera_id>/start')
+def start_camera(camera_id):
+    get_camera(camera_id).start()
+    return jsonify({"status": "success", "message": f"Camera {camera_id} started"})
+
+@api.route('/cameras/<camera_id>/stop')
+def stop_camera(camera_id):
+    get_camera(camera_id).stop()
+    return jsonify({"status": "success", "message": f"Camera {camera_id} stopped"})
+
+@api.route('/cameras/<camera_id>/restart')
+def restart_camera(camera_id):
+    get_camera(camera_id).restart()
+    return jsonify({"status": "success", "message": f"Camera {camera_id} restarted"})
+
+@api.route('/cameras/<camera_id>/frame')
+def get_camera_frame(camera_id):
+    status, jpeg, seq = get_camera(camera_id).snapshot(*requested_tier())
+    if jpeg is None:
+        return jsonify({'error': 'No frame available'}), 404
+    return jsonify({
+        **(status.as_dict() if status is not None else {}),
+        'seq': seq,
+        'frame': base64.b64encode(jpeg).decode('utf-8')
+    })
+
+@api.route('/cameras/<camera_id>/status.bin')
+def get_camera_status_binary(camera_id):
+    camera = get_camera(camera_id)
+    # Just the status: reading it doesn't trigger a JPEG encode
+    status = camera.status
+    if status is None:
+        return jsonify({'error': 'No status available'}), 404
+    return binary_status_response(status, f'camera-{camera_id}')
+
+@api.route('/cameras/<camera_id>/stream')
+def stream_camera(camera_id):
+    camera = get_camera(camera_id)
+    width, quality = requested_tier()
+    return mjpeg_response(
+        lambda last_seq: camera.wait_frame(last_seq, 1.0, width, quality),
+        camera.is_running
+    )
+
+@api.route('/cameras/<camera_id>/status')
+def get_camera_status(camera_id):
+    camera = get_camera(camera_id)
+    status = camera.status
+    return jsonify({
+        "status": "success",
+        "camera": camera.info(),
+        "data": status.as_dict() if status is not None else None
+    })
+
+# Columns the entries API returns; selected directly instead of loading ORM objects
+ENTRY_COLUMNS = (
+    VehicleEntry.id,
+    VehicleEntry.ticket_number,
+    VehicleEntry.plate_number,
+    VehicleEntry.vehicle_type,
+    VehicleEntry.entry_time,
+    VehicleEntry.parking_slot,
+    VehicleEntry.driver_name,
+    VehicleEntry.contact_number,
+    VehicleEntry.status
+)
+
+def serialize_entry(entry):
+    """API form of a vehicle entry (an ORM object or a row of ENTRY_COLUMNS)"""
+    # One isoformat() instead of two strftime() calls
+    entry_time = entry.entry_time.isoformat()
+    return {
         'id': entry.id,
         'ticketNumber': entry.ticket_number,
         'plateNumber': entry.plate_number,
         'vehicleType': entry.vehicle_type,
-        'entryTime': entry.entry_time.strftime('%H:%M'),
-        'date': entry.entry_time.strftime('%Y-%m-%d'),
+        'entryTime': entry_time[11:16],
+        'date': entry_time[:10],
         'parkingSlot': entry.parking_slot,
         'driverName': entry.driver_name,
         'contactNumber': entry.contact_number,
         'status': entry.status
-    } for entry in entries])
+    }
+
+def encode_cursor(entry_time, entry_id):
+    raw = f"{entry_time.isoformat()}|{entry_id}".encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip('=')
+
+def decode_cursor(cursor):
+    """(entry_time, id) from a cursor; raises ValueError if it is malformed"""
+    # binascii.Error and UnicodeDecodeError are ValueErrors too
+    raw = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4)).decode()
+    entry_time, entry_id = raw.split('|')
+    return datetime.fromisoformat(entry_time), int(entry_id)
+
+def parse_date_arg(name, end_of_day=False):
+    """ISO date/datetime query argument; a bare date used as an upper bound covers the whole day"""
+    value = request.args.get(name)
+    if not value:
+        return None
+    parsed = datetime.fromisoformat(value)
+    if end_of_day and len(value) == 10:
+        parsed += timedelta(days=1)
+    return parsed
+
+def entry_filters():
+    """The ?status=, ?slot=, ?from= and ?to= filters, None where not given.
+
+    Raises ValueError for a value that doesn't parse, so a bad filter is
+    reported instead of silently matching everything.
+    """
+    slot = request.args.get('slot')
+    return {
+        'status': request.args.get('status') or None,
+        'slot': int(slot) if slot else None,
+        'start': parse_date_arg('from'),
+        'end': parse_date_arg('to', end_of_day=True)
+    }
+
+def filter_entries(query, filters=None):
+    """Apply the filters shared by the entry endpoints (``entry_filters()`` by default)"""
+    if filters is None:
+        filters = entry_filters()
+    if filters['status'] is not None:
+        query = query.filter(VehicleEntry.status == filters['status'])
+    if filters['slot'] is not None:
+        query = query.filter(VehicleEntry.parking_slot == filters['slot'])
+    # Dates are matched against entry_time (local time), the date the API shows
+    if filters['start'] is not None:
+        query = query.filter(VehicleEntry.entry_time >= filters['start'])
+    if filters['end'] is not None:
+        query = query.filter(VehicleEntry.entry_time < filters['end'])
+    return query
+
+@api.route('/vehicle-entries', methods=['GET'])
+def get_entries():
+    """Newest entries first, one page at a time.
+
+    ``?limit=`` sets the page size (ENTRIES_PAGE_SIZE by default, at most
+    ENTRIES_MAX_PAGE_SIZE). When more entries follow, the response carries an
+    ``X-Next-Cursor`` header; pass it back as ``?cursor=`` for the next page.
+    """
+    limit = request.args.get('limit', Config.ENTRIES_PAGE_SIZE, type=int)
+    limit = min(max(limit, 1), Config.ENTRIES_MAX_PAGE_SIZE)
+
+    try:
+        query = filter_entries(db.session.query(*ENTRY_COLUMNS))
+        cursor = request.args.get('cursor')
+        if cursor:
+            entry_time, entry_id = decode_cursor(cursor)
+            # Keyset: strictly after the last row of the previous page
+            query = query.filter(db.or_(
+                VehicleEntry.entry_time < entry_time,
+                db.and_(VehicleEntry.entry_time == entry_time, VehicleEntry.id < entry_id)
+            ))
+    except ValueError as e:
+        return jsonify({'error': f'Invalid query: {e}'}), 400
+
+    rows = query.order_by(VehicleEntry.entry_time.desc(), VehicleEntry.id.desc()).limit(limit + 1).all()
+    response = jsonify([serialize_entry(row) for row in rows[:limit]])
+    if len(rows) > limit:
+        last = rows[limit - 1]
+        response.headers['X-Next-Cursor'] = encode_cursor(last.entry_time, last.id)
+    return response
+
+# Column order of the export: the keys of serialize_entry()
+EXPORT_FIELDS = ('id', 'ticketNumber', 'plateNumber', 'vehicleType', 'entryTime', 'date',
+                 'parkingSlot', 'driverName', 'contactNumber', 'status')
+EXPORT_FORMATS = {
+    'csv': 'text/csv',
+    'ndjson': 'application/x-ndjson'
+}
+
+def export_chunks(rows, export_format):
+    """Serialized `rows` as CSV or NDJSON text, one chunk per EXPORT_BATCH_SIZE rows"""
+    buffer = io.StringIO()
+    if export_format == 'csv':
+        writer = csv.DictWriter(buffer, fieldnames=EXPORT_FIELDS)
+        writer.writeheader()
+        write = writer.writerow
+    else:
+        write = lambda entry: buffer.write(json.dumps(entry) + '\n')
+
+    # Sent before the query runs so the client gets the headers (and the CSV header) at once
+    yield buffer.getvalue()
+    buffer.seek(0)
+    buffer.truncate()
+
+    batch_size = Config.EXPORT_BATCH_SIZE
+    pending = 0
+    for row in rows:
+        write(serialize_entry(row))
+        pending += 1
+        if pending == batch_size:
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+            pending = 0
+    if pending:
+        yield buffer.getvalue()
+
+@api.route('/vehicle-entries/export', methods=['GET'])
+def export_entries():
+    """Stream every matching entry, oldest first, as ``?format=csv`` (default) or ``ndjson``.
+
+    Takes the same filters as the listing. Rows are fetched from the database
+    EXPORT_BATCH_SIZE at a time, so memory use doesn't grow with the export.
+    """
+    export_format = request.args.get('format', 'csv')
+    if export_format not in EXPORT_FORMATS:
+        return jsonify({'error': f'Unsupported format: {export_format}'}), 400
+
+    try:
+        query = filter_entries(db.session.query(*ENTRY_COLUMNS))
+    except ValueError as e:
+        return jsonify({'error': f'Invalid query: {e}'}), 400
+
+    rows = query.order_by(VehicleEntry.entry_time, VehicleEntry.id).yield_per(Config.EXPORT_BATCH_SIZE)
+    response = Response(
+        stream_with_context(export_chunks(rows, export_format)),
+        mimetype=EXPORT_FORMATS[export_format]
+    )
+    response.headers['Content-Disposition'] = f'attachment; filename=vehicle-entries.{export_format}'
+    # Keep proxies from buffering the whole download
+    response.headers['X-Accel-Buffering'] = 'no'
+    return response
 
 @api.route('/vehicle-entries', methods=['POST'])
 def create_entry():
@@ -245,23 +675,157 @@ def create_entry():
         db.session.commit()
         return jsonify({
             'message': 'Entry created successfully',
-            'entry': {
-                'id': new_entry.id,
-                'ticketNumber': new_entry.ticket_number,
-                'plateNumber': new_entry.plate_number,
-                'vehicleType': new_entry.vehicle_type,
-                'entryTime': new_entry.entry_time.strftime('%H:%M'),
-                'date': new_entry.entry_time.strftime('%Y-%m-%d'),
-                'parkingSlot': new_entry.parking_slot,
-                'driverName': new_entry.driver_name,
-                'contactNumber': new_entry.contact_number,
-                'status': new_entry.status
-            }
+            'entry': serialize_entry(new_entry)
         }), 201
     except Exception as e:
         db.session.rollback()
         return jsonify({'error': str(e)}), 400
 
+# Request fields every new entry must have, and the columns they go into
+ENTRY_FIELDS = {
+    'ticketNumber': 'ticket_number',
+    'plateNumber': 'plate_number',
+    'vehicleType': 'vehicle_type',
+    'parkingSlot': 'parking_slot',
+    'driverName': 'driver_name',
+    'contactNumber': 'contact_number'
+}
+
+def is_integer(value):
+    # bool is an int subclass, but true is no id or parking slot
+    return isinstance(value, int) and not isinstance(value, bool)
+
+def entry_row(item):
+    """Column values for a new entry from request `item`; ValueError says what is wrong"""
+    missing = [field for field in ENTRY_FIELDS if item.get(field) in (None, '')]
+    if missing:
+        raise ValueError(f'Missing fields: {", ".join(missing)}')
+    row = {}
+    for field, name in ENTRY_FIELDS.items():
+        value = item[field]
+        column_type = VehicleEntry.__table__.c[name].type
+        if isinstance(column_type, db.Integer):
+            if not is_integer(value):
+                raise ValueError(f'{field} must be an integer')
+        elif not isinstance(value, str):
+            raise ValueError(f'{field} must be a string')
+        elif column_type.length is not None and len(value) > column_type.length:
+            raise ValueError(f'{field} must be at most {column_type.length} characters')
+        row[name] = value
+    return row
+
+@api.route('/vehicle-entries/bulk', methods=['POST'])
+def create_entries():
+    """Insert a list of entries (``{"entries": [...]}``) in one transaction.
+
+    Each item is validated on its own; invalid ones are reported under
+    ``errors`` with their index and the rest are inserted with a single
+    multi-row INSERT.
+    """
+    data = request.get_json(silent=True)
+    if not isinstance(data, dict):
+        return jsonify({'error': 'Expected a JSON object with an "entries" list'}), 400
+    items = data.get('entries')
+    if not isinstance(items, list) or not items:
+        return jsonify({'error': 'Expected a non-empty "entries" list'}), 400
+    if len(items) > Config.BULK_MAX_ENTRIES:
+        return jsonify({'error': f'At most {Config.BULK_MAX_ENTRIES} entries per request'}), 400
+
+    errors = []
+    valid = {}
+    for index, item in enumerate(items):
+        if not isinstance(item, dict):
+            errors.append({'index': index, 'error': 'Entry must be an object'})
+            continue
+        try:
+            row = entry_row(item)
+        except ValueError as e:
+            errors.append({'index': index, 'error': str(e)})
+            continue
+        ticket_number = row['ticket_number']
+        if ticket_number in valid:
+            errors.append({'index': index, 'error': 'Duplicate ticket number in request'})
+        else:
+            valid[ticket_number] = (index, row)
+
+    # One lookup for every ticket number that is already taken
+    if valid:
+        taken = db.session.query(VehicleEntry.ticket_number).filter(
+            VehicleEntry.ticket_number.in_(list(valid))
+        ).all()
+        for (ticket_number,) in taken:
+            index, _ = valid.pop(ticket_number)
+            errors.append({'index': index, 'error': 'Ticket number already exists'})
+    errors.sort(key=lambda error: error['index'])
+
+    if not valid:
+        return jsonify({'error': 'No valid entries', 'errors': errors}), 400
+
+    now = datetime.now()
+    rows = [{**row, 'entry_time': now, 'status': 'Active'} for _, row in valid.values()]
+
+    try:
+        db.session.execute(VehicleEntry.__table__.insert(), rows)
+        db.session.commit()
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'error': str(e), 'errors': errors}), 400
+
+    created = db.session.query(*ENTRY_COLUMNS).filter(
+        VehicleEntry.ticket_number.in_(list(valid))
+    ).order_by(VehicleEntry.id).all()
+    return jsonify({
+        'message': f'{len(created)} entries created',
+        'entries': [serialize_entry(row) for row in created],
+        'errors': errors
+    }), 201
+
+@api.route('/vehicle-entries/complete', methods=['POST'])
+def complete_entries():
+    """Mark Active entries Completed with a single UPDATE.
+
+    The entries are picked by a JSON body ``{"ids": [...]}`` or by the
+    listing's ``?slot=``, ``?from=`` and ``?to=`` filters; one of the two is
+    required so an empty request can't close out everything.
+    """
+    data = request.get_json(silent=True)
+    query = VehicleEntry.query.filter(VehicleEntry.status == 'Active')
+
+    try:
+        # No body at all means the filters pick the entries
+        if data is not None and not isinstance(data, dict):
+            raise ValueError('the body must be a JSON object')
+        ids = (data or {}).get('ids')
+        if ids is not None:
+            if not isinstance(ids, list) or not ids:
+                raise ValueError('"ids" must be a non-empty list')
+            if len(ids) > Config.BULK_MAX_ENTRIES:
+                raise ValueError(f'at most {Config.BULK_MAX_ENTRIES} ids per request')
+            if not all(is_integer(entry_id) for entry_id in ids):
+                raise ValueError('"ids" must all be integers')
+            query = query.filter(VehicleEntry.id.in_(ids))
+        else:
+            filters = entry_filters()
+            if filters['status'] is not None:
+                raise ValueError('only Active entries are completed; "status" is not accepted')
+            # Checked on the parsed values: a filter that doesn't apply must not widen the update
+            if all(filters[name] is None for name in ('slot', 'start', 'end')):
+                raise ValueError('pass "ids" or a slot/from/to filter')
+            query = filter_entries(query, filters)
+    except (TypeError, ValueError) as e:
+        return jsonify({'error': f'Invalid request: {e}'}), 400
+
+    try:
+        updated = query.update(
+            {VehicleEntry.status: 'Completed', VehicleEntry.exit_time: datetime.now()},
+            synchronize_session=False
+        )
+        db.session.commit()
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'error': str(e)}), 400
+    return jsonify({'message': f'{updated} entries completed', 'updated': updated})
+
 @api.route('/vehicle-entries/<int:entry_id>', methods=['PUT'])
 def update_entry(entry_id):
     entry = VehicleEntry.query.get_or_404(entry_id)
@@ -291,6 +855,43 @@ def delete_entry(entry_id):
         db.session.rollback()
         return jsonify({'error': str(e)}), 400
 
+@api.route('/reports/occupancy')
+def get_occupancy_report():
+    """Occupancy between ``?from=`` and ``?to=`` (the last day by default), read from the rollups.
+
+    ``?granularity=`` is minute, hour or day; by default the smallest that
+    fits in REPORT_MAX_BUCKETS buckets. ``?by=lot`` (default) reports each
+    camera's lot, ``?by=spot`` each spot (``?spot=`` for just one).
+    ``?camera=`` limits the report to one camera.
+    """
+    try:
+        end = parse_date_arg('to', end_of_day=True) or datetime.now()
+        start = parse_date_arg('from') or end - timedelta(days=1)
+        if start >= end:
+            raise ValueError('"from" must be before "to"')
+        granularity = request.args.get('granularity') or pick_granularity(start, end, Config.REPORT_MAX_BUCKETS)
+        if granularity not in GRANULARITIES:
+            raise ValueError(f'granularity must be one of {", ".join(GRANULARITIES)}')
+        if (end - start) / GRANULARITIES[granularity] > Config.REPORT_MAX_BUCKETS:
+            raise ValueError(f'more than {Config.REPORT_MAX_BUCKETS} {granularity} buckets; use a coarser granularity')
+        by = request.args.get('by', 'lot')
+        if by not in ('lot', 'spot'):
+            raise ValueError('by must be lot or spot')
+    except ValueError as e:
+        return jsonify({'error': f'Invalid query: {e}'}), 400
+
+    # Every configured spot is listed, including ones that were never occupied
+    spot_ids = {camera_id: worker.spot_ids for camera_id, worker in get_camera_manager().workers.items()}
+    data = occupancy_report(start, end, granularity, camera=request.args.get('camera'),
+                            by=by, spot_id=request.args.get('spot', type=int), spot_ids=spot_ids)
+    return jsonify({
+        "status": "success",
+        "granularity": granularity,
+        "from": start.isoformat(),
+        "to": end.isoformat(),
+        "data": data
+    })
+
 @api.route('/print', methods=['POST'])
 def print_receipt():
     try:
@@ -0,0 +1,34 @@
+from flask_socketio import SocketIO, emit
+
+from . import routes
+
+socketio = SocketIO()
+
+
+def broadcast_delta(delta):
+    socketio.emit('delta', delta)
+
+
+routes.status_listeners.append(broadcast_delta)
+
+
+@socketio.on('connect')
+def on_connect():
+    # The static layout goes out once per connection; after that only deltas
+    feed = routes.get_status_feed()
+    emit('layout', feed.layout)
+    emit('snapshot', feed.snapshot())
+
+
+@socketio.on('resync')
+def on_resync(data):
+    """Client saw a gap in delta seqs: replay what it missed, or a fresh snapshot"""
+    feed = routes.get_status_feed()
+    seq = data.get('since') if isinstance(data, dict) else None
+    # Anything but a seq gets the snapshot rather than an error
+    deltas = feed.since(seq) if routes.is_integer(seq) else None
+    if deltas is None:
+        emit('snapshot', feed.snapshot())
+        return
+    for delta in deltas:
+        emit('delta', delta)
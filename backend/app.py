@@ -7,24 +7,31 @@ import os
 sys.path.append(os.path.dirname(os.path.dirname(__file__)))
 
 from backend.config import Config
-from backend.models import db
+from backend.models import db, ensure_indexes
 from backend.api.routes import api
+from backend.api.socket_events import socketio
+from backend.services.history import history_writer
 
 def create_app():
     app = Flask(__name__)
     app.config.from_object(Config)
     
-    CORS(app)
+    # Let browsers read the pagination cursor header
+    CORS(app, expose_headers=['X-Next-Cursor'])
     db.init_app(app)
+    # Detector transitions are written in batches from a background thread
+    history_writer.init_app(app)
     
     with app.app_context():
         db.create_all()
+        ensure_indexes()
     
     app.register_blueprint(api, url_prefix='/api')
+    socketio.init_app(app, cors_allowed_origins='*', async_mode=Config.SOCKETIO_ASYNC_MODE)
     
     return app
 
 if __name__ == '__main__':
     print("Starting server on http://localhost:5000")
     app = create_app()
-    app.run(debug=True, port=5000, host='0.0.0.0', threaded=True)
+    socketio.run(app, debug=True, port=5000, host='0.0.0.0')
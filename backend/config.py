@@ -18,7 +18,68 @@ class Config:
     # Parking space coordinates
     COORDINATES_PATH = '../data/coordinates_1.yml'
     START_FRAME = 0  # For RTSP, start from beginning
+
+    # Cameras run by the detection service, one worker process each.
+    # Relative coordinate paths are resolved against the backend directory.
+    CAMERAS = [
+        {'id': 'main', 'source': VIDEO_SOURCE, 'coordinates': COORDINATES_PATH},
+    ]
     
     # RTSP Stream Settings
     RTSP_BUFFER_SIZE = 1
-    RTSP_LATENCY = 60  # milliseconds 
\ No newline at end of file
+    RTSP_LATENCY = 60  # milliseconds 
+
+    # Detection pipeline: worker threads per stage (detect always runs on one)
+    # and the capacity of the drop-oldest queue in front of each stage
+    PIPELINE_WORKERS = {'preprocess': 1, 'render': 2}
+    PIPELINE_QUEUE_SIZE = 2
+
+    # Long-poll limits for /api/frame?since=<seq> (seconds)
+    FRAME_LONG_POLL_TIMEOUT = 10
+    FRAME_LONG_POLL_MAX = 30
+
+    # Status deltas kept for Socket.IO resync and /api/events Last-Event-ID replay
+    STATUS_HISTORY = 1024
+    SSE_KEEPALIVE = 15  # seconds
+
+    # JPEGs are encoded on demand; ?w=/&q= requests snap to these tiers
+    JPEG_QUALITY = 85
+    JPEG_WIDTHS = [320, 640, 1280]
+    JPEG_QUALITIES = [40, 60, 85]
+    JPEG_ENCODE_WORKERS = 0  # >0 encodes on a thread pool of this size
+
+    # 'thread' runs detection inside the web process (python -m backend.app);
+    # 'process' runs it in a CameraManager worker process (backend.serve sets this)
+    DETECTION_MODE = 'thread'
+    DEFAULT_CAMERA = 'main'
+
+    # Socket.IO server mode. Never left to auto-detection: with gevent installed it
+    # would pick gevent without the monkey patching only serve.py applies, and
+    # blocking waits would stall every connection. serve.py switches to 'gevent'
+    SOCKETIO_ASYNC_MODE = 'threading'
+
+    # GET /api/vehicle-entries page size (?limit=) default and upper bound
+    ENTRIES_PAGE_SIZE = 50
+    ENTRIES_MAX_PAGE_SIZE = 500
+
+    # Rows fetched per database round trip (and per response chunk) when exporting entries
+    EXPORT_BATCH_SIZE = 1000
+
+    # Largest batch accepted by the bulk entry endpoints (keeps IN lists under SQLite's variable limit)
+    BULK_MAX_ENTRIES = 500
+
+    # Spot transition history: queued in memory and written with one INSERT every
+    # HISTORY_FLUSH_INTERVAL seconds or HISTORY_FLUSH_EVENTS transitions. At most
+    # HISTORY_BUFFER_SIZE are queued; HISTORY_OVERFLOW ('drop_oldest' or
+    # 'drop_newest') decides which are lost when the database can't keep up
+    HISTORY_BUFFER_SIZE = 10000
+    HISTORY_FLUSH_INTERVAL = 5  # seconds
+    HISTORY_FLUSH_EVENTS = 200
+    HISTORY_OVERFLOW = 'drop_oldest'
+    # A camera silent for longer than this (seconds) counts as stopped; the gap is
+    # left out of the occupancy rollups
+    HISTORY_MAX_GAP = 30
+
+    # Most buckets /api/reports/occupancy returns per series; picks the granularity
+    # when none is given
+    REPORT_MAX_BUCKETS = 1000
\ No newline at end of file
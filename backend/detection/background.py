@@ -0,0 +1,67 @@
+import cv2
+import numpy as np
+
+
+class SpotModelBank:
+    """Background model for all parking spots, updated once per frame.
+
+    Every spot's masked grayscale ROI is packed into a fixed slot of a single
+    mosaic image and one MOG2 model is run over that mosaic. Each spot always
+    lands on the same pixels, so its part of the model only ever sees that
+    spot, and model memory is bounded by the spot's bounding-rect area times
+    ``n_mixtures``.
+    """
+
+    def __init__(self, layout, learning_rate=0.002, warmup_frames=50,
+                 history=500, var_threshold=16, detect_shadows=True, n_mixtures=3):
+        self.layout = layout
+        self.learning_rate = learning_rate
+        self.warmup_frames = warmup_frames
+        self.frames_seen = 0
+
+        # Stack spot ROIs vertically: slot i covers rows offsets[i]:offsets[i] + h_i
+        heights = layout.rects[:, 3]
+        self.offsets = np.concatenate(([0], np.cumsum(heights)[:-1])).astype(np.int64)
+        width = int(layout.rects[:, 2].max()) if layout.count else 0
+        height = int(heights.sum())
+
+        self.mosaic = np.zeros((height, width), dtype=np.uint8)
+        self.fg_mask = np.zeros((height, width), dtype=np.uint8)
+        self.labels = np.full((height, width), layout.count, dtype=np.int32)
+        for index in range(layout.count):
+            self._slot(self.labels, index)[layout.masks[index]] = index
+
+        self.model = cv2.createBackgroundSubtractorMOG2(
+            history=history,
+            varThreshold=var_threshold,
+            detectShadows=detect_shadows
+        )
+        self.model.setNMixtures(n_mixtures)
+
+        # Per-spot foreground pixel counts from the last update
+        self.foreground_counts = np.zeros(layout.count, dtype=np.int64)
+
+    def _slot(self, image, index):
+        _, _, w, h = self.layout.rects[index]
+        top = self.offsets[index]
+        return image[top:top + h, :w]
+
+    def apply(self, gray):
+        """Pack the spots of a grayscale frame and update the model once"""
+        layout = self.layout
+        for index in range(layout.count):
+            np.copyto(self._slot(self.mosaic, index), layout.roi(gray, index),
+                      where=layout.masks[index])
+
+        # Let the model settle quickly on start-up, then adapt slowly
+        rate = -1 if self.frames_seen < self.warmup_frames else self.learning_rate
+        self.fg_mask = self.model.apply(self.mosaic, learningRate=rate)
+        self.frames_seen += 1
+
+        foreground = self.labels[self.fg_mask > 0]
+        self.foreground_counts = np.bincount(foreground, minlength=layout.count + 1)[:layout.count]
+        return self.foreground_counts
+
+    def foreground(self, index):
+        """Foreground mask of a spot from the last update (no copy)"""
+        return self._slot(self.fg_mask, index)
@@ -0,0 +1,65 @@
+import cv2
+import numpy as np
+
+
+class ChangeGate:
+    """Decide which spots are worth running the full classifier on.
+
+    Each spot is summarised by a tiny downsampled signature of its rectified
+    patch. A spot is re-evaluated only when its signature has drifted past
+    ``threshold`` (mean absolute difference in gray levels) from the one it
+    had at its last full check, or when that check is older than ``max_age``
+    seconds. Everything else keeps its previous status.
+    """
+
+    def __init__(self, count, threshold=4.0, max_age=10.0, grid=(8, 8)):
+        self.count = count
+        self.threshold = threshold
+        self.max_age = max_age
+        self.grid_width, self.grid_height = grid
+
+        self.signatures = np.zeros((count, self.grid_height, self.grid_width), dtype=np.float32)
+        self.checked_at = np.full(count, -np.inf)
+
+        # Counters for observing how much work the gate saves
+        self.evaluated_total = 0
+        self.skipped_total = 0
+        self.last_evaluated = 0
+        self.last_skipped = 0
+
+    def signature(self, patches):
+        """Downsample an (N, H, W) patch tensor to (N, grid_h, grid_w) block means"""
+        n, h, w = patches.shape
+        small = cv2.resize(patches.reshape(n * h, w), (self.grid_width, n * self.grid_height),
+                           interpolation=cv2.INTER_AREA)
+        return small.reshape(n, self.grid_height, self.grid_width).astype(np.float32)
+
+    def select(self, signatures, now):
+        """Boolean mask of spots that need a full check at time `now`"""
+        drift = np.abs(signatures - self.signatures).mean(axis=(1, 2))
+        return (drift > self.threshold) | (now - self.checked_at >= self.max_age)
+
+    def commit(self, evaluate, signatures, now, remember=True):
+        """Record the spots that were fully checked and update the counters.
+
+        Without `remember` only the counters move: the checks are not trusted
+        enough to skip the next ones.
+        """
+        if remember:
+            self.signatures[evaluate] = signatures[evaluate]
+            self.checked_at[evaluate] = now
+
+        self.last_evaluated = int(np.count_nonzero(evaluate))
+        self.last_skipped = self.count - self.last_evaluated
+        self.evaluated_total += self.last_evaluated
+        self.skipped_total += self.last_skipped
+
+    def stats(self):
+        checked = self.evaluated_total + self.skipped_total
+        return {
+            'evaluated_total': self.evaluated_total,
+            'skipped_total': self.skipped_total,
+            'last_evaluated': self.last_evaluated,
+            'last_skipped': self.last_skipped,
+            'skip_ratio': self.skipped_total / checked if checked else 0.0
+        }
@@ -1,10 +1,17 @@
 import cv2
 import numpy as np
 import logging
-from .drawing_utils import draw_contours
 from .colors import COLOR_GREEN, COLOR_WHITE, COLOR_BLUE, COLOR_RED
+from .spot_layout import SpotLayout
+from .background import SpotModelBank
+from .rectifier import SpotRectifier, edge_density as patch_edge_density
+from .change_gate import ChangeGate
+from .spot_state import SpotStateStore
+from .overlay import OverlayRenderer
+from .status_snapshot import StatusSnapshot
 import yaml
 import os
+import time
 
 
 class MotionDetector:
@@ -18,56 +25,56 @@ class MotionDetector:
         # Extract spots and original dimensions from coordinates data
         self.original_dimensions = coordinates_data['frame_dimensions']
         self.coordinates_data = coordinates_data['spots']
+
+        # Compile per-spot geometry once; every per-frame path reads from it
+        self.layout = SpotLayout(self.coordinates_data, self.original_dimensions)
         
         # Initialize statuses
         self.total_spaces = len(self.coordinates_data)
-        self.statuses = [False] * self.total_spaces
+        self.state = SpotStateStore(self.total_spaces, delay=MotionDetector.DETECT_DELAY)
+        self.observed = np.zeros(self.total_spaces, dtype=bool)
         self.free_spaces = self.total_spaces
         self.occupied_spaces = 0
 
-        # Create background subtractor with optimized parameters
-        self.bg_subtractor = cv2.createBackgroundSubtractorMOG2(
-            history=500,
-            varThreshold=16,
-            detectShadows=True
-        )
+        # One background model over all spots, updated once per frame
+        self.model_bank = SpotModelBank(self.layout)
+
+        # Remap tables that warp every spot into a canonical patch in one call
+        self.rectifier = SpotRectifier(self.layout)
+
+        # Skip the full classifier for spots whose patch hasn't changed
+        self.gate = ChangeGate(self.layout.count)
+
+        # Outlines and labels are rasterized once, not redrawn every frame
+        self.overlay = OverlayRenderer(self.layout)
 
-    def _coordinates(self, p):
-        """Convert coordinates from YAML format to contour format"""
-        return np.array(p["coordinates"], np.int32).reshape((-1, 1, 2))
+        # Readers on other threads only ever look at this published snapshot
+        self.snapshot = None
+        self._publish_snapshot(None)
 
-    def _check_parking_space(self, frame, contour):
+    @property
+    def statuses(self):
+        """Debounced status of every spot (True = available)"""
+        return self.state.status.tolist()
+
+    def _publish_snapshot(self, timestamp):
+        seq = self.snapshot.seq + 1 if self.snapshot is not None else 0
+        # Built completely first, then swapped in with a single assignment
+        self.snapshot = StatusSnapshot(seq, self.state.version, timestamp, self.state.status,
+                                       self.state.confidence)
+
+    def _check_parking_space(self, index, occupation, edge_density):
         """Check if a parking space is occupied by a motorcycle"""
-        # Create mask for the parking space
-        mask = np.zeros(frame.shape[:2], dtype=np.uint8)
-        cv2.drawContours(mask, [contour], -1, (255), -1)
-        
-        # Get ROI
-        x, y, w, h = cv2.boundingRect(contour)
-        roi = frame[y:y+h, x:x+w]
-        roi_mask = mask[y:y+h, x:x+w]
-        
-        # Apply mask to ROI
-        masked_roi = cv2.bitwise_and(roi, roi, mask=roi_mask)
-        
-        # Convert to grayscale
-        gray_roi = cv2.cvtColor(masked_roi, cv2.COLOR_BGR2GRAY)
-        
-        # Apply background subtraction
-        fg_mask = self.bg_subtractor.apply(gray_roi)
-        
-        # Calculate motion metrics
-        pixels = cv2.countNonZero(fg_mask)
-        area = cv2.contourArea(contour)
-        occupation = pixels / area if area > 0 else 0
+        x, y, w, h = self.layout.rects[index]
+
+        # Foreground of this spot from the last model update
+        fg_mask = self.model_bank.foreground(index)
 
         # If there's significant motion/occupation
         if occupation > 0.2:  # Increased threshold to avoid false positives
             # Motorcycle-specific checks
             
-            # 1. Edge Detection
-            edges = cv2.Canny(gray_roi, 50, 150)
-            edge_density = cv2.countNonZero(edges) / (w * h)
+            # 1. Edge Detection (batched over the rectified patches)
             
             # 2. Shape Analysis
             aspect_ratio = w / h if h > 0 else 0
@@ -115,35 +122,62 @@ class MotionDetector:
             
         return True  # Space is available
 
-    def process_frame(self, frame):
-        """Process a frame and update parking space statuses"""
+    def process_frame(self, frame, timestamp=None, draw=True):
+        """Process a frame and update parking space statuses.
+
+        With `draw` the spot outlines are painted onto `frame`; pass False
+        when the caller renders its own overlay (the frame is then not
+        modified).
+        """
         if frame is None:
             return []
+        if timestamp is None:
+            timestamp = time.monotonic()
         
-        # Update statuses
-        self.statuses = []
-        occupied_count = 0
-        
-        for p in self.coordinates_data:
-            coordinates = self._coordinates(p)
-            status = self._check_parking_space(frame, coordinates)
-            self.statuses.append(status)
-            
-            # Draw contours with correct colors
-            color = COLOR_GREEN if status else COLOR_RED  # GREEN for available, RED for occupied
-            cv2.drawContours(frame, [coordinates], -1, color, 2)
-            
-            # Add spot number
-            x, y = coordinates[0][0]
-            cv2.putText(frame, str(p['id']), (x, y + 20),
-                       cv2.FONT_HERSHEY_SIMPLEX, 0.5, COLOR_WHITE, 2)
-            
-            if not status:  # If space is occupied
-                occupied_count += 1
+        layout = self.layout
+        gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+        model_bank = self.model_bank
+        foreground_counts = model_bank.apply(gray)
+        if model_bank.frames_seen == 1:
+            # With no background yet MOG2 calls every pixel foreground, so the
+            # first frame says nothing about the spots
+            if draw:
+                self.overlay.draw(frame, self.state.status)
+            return self.statuses
+        occupations = foreground_counts / np.maximum(layout.areas, 1)
+
+        # Only spots whose patch moved (or whose last check is stale) get the
+        # full check; while the model is still warming up every spot does
+        patches = self.rectifier.warp(gray)
+        signatures = self.gate.signature(patches)
+        warming = model_bank.frames_seen <= model_bank.warmup_frames
+        if warming:
+            evaluate = np.ones(layout.count, dtype=bool)
+        else:
+            evaluate = self.gate.select(signatures, timestamp)
+
+        # Edge density for every evaluated spot at once, only when some spot needs it
+        densities = np.zeros(layout.count)
+        candidates = evaluate & (occupations > 0.2)
+        if candidates.any():
+            densities[candidates] = patch_edge_density(patches[candidates])
+
+        # Skipped spots keep their previous observation
+        for index in np.flatnonzero(evaluate):
+            self.observed[index] = self._check_parking_space(index, occupations[index], densities[index])
+
+        self.gate.commit(evaluate, signatures, timestamp, remember=not warming)
+
+        # Debounce the raw observations into the published statuses
+        self.state.update(self.observed, timestamp, np.clip(occupations, 0, 1))
+        if draw:
+            # GREEN for available, RED for occupied
+            self.overlay.draw(frame, self.state.status)
         
         # Update counts
-        self.occupied_spaces = occupied_count
-        self.free_spaces = self.total_spaces - occupied_count
+        self.free_spaces = self.state.free_count
+        self.occupied_spaces = self.state.occupied_count
+        self._publish_snapshot(timestamp)
         
         return self.statuses
 
@@ -155,36 +189,12 @@ class MotionDetector:
 
         coordinates_data = self.coordinates_data
         logging.debug("coordinates data: %s", coordinates_data)
+        logging.debug("rects: %s", self.layout.rects)
 
-        for p in coordinates_data:
-            coordinates = self._coordinates(p)
-            logging.debug("coordinates: %s", coordinates)
-
-            rect = cv2.boundingRect(coordinates)
-            logging.debug("rect: %s", rect)
-
-            new_coordinates = coordinates.copy()
-            new_coordinates[:, 0] = coordinates[:, 0] - rect[0]
-            new_coordinates[:, 1] = coordinates[:, 1] - rect[1]
-            logging.debug("new_coordinates: %s", new_coordinates)
-
-            self.contours.append(coordinates)
-            self.bounds.append(rect)
-
-            mask = cv2.drawContours(
-                np.zeros((rect[3], rect[2]), dtype=np.uint8),
-                [new_coordinates],
-                contourIdx=-1,
-                color=255,
-                thickness=-1,
-                lineType=cv2.LINE_8)
-
-            mask = mask == 255
-            self.mask.append(mask)
-            logging.debug("mask: %s", self.mask)
-
-        statuses = [False] * len(coordinates_data)
-        times = [None] * len(coordinates_data)
+        # Every spot starts out occupied and only turns free once that has
+        # been seen for DETECT_DELAY
+        state = SpotStateStore(self.total_spaces, delay=MotionDetector.DETECT_DELAY, adopt_first=False)
+        overlay = OverlayRenderer(self.layout, thickness=1, label_offset=1)
 
         while capture.isOpened():
             result, frame = capture.read()
@@ -200,33 +210,19 @@ class MotionDetector:
             
             position_in_seconds = capture.get(cv2.CAP_PROP_POS_MSEC) / 1000.0
 
-            # Process each parking space
-            for index, c in enumerate(coordinates_data):
-                status = self.__apply(grayed, index, c)
-
-                if times[index] is not None and self.same_status(statuses, index, status):
-                    times[index] = None
-                    continue
+            # Score every parking space in one pass
+            available = self._laplacian_scores(grayed) < self.LAPLACIAN
 
-                if times[index] is not None and self.status_changed(statuses, index, status):
-                    if position_in_seconds - times[index] >= MotionDetector.DETECT_DELAY:
-                        statuses[index] = status
-                        times[index] = None
-                    continue
-
-                if times[index] is None and self.status_changed(statuses, index, status):
-                    times[index] = position_in_seconds
+            state.update(available, position_in_seconds)
+            statuses = state.status
 
             # Draw parking space markers
-            for index, p in enumerate(coordinates_data):
-                coordinates = self._coordinates(p)
-                color = COLOR_GREEN if statuses[index] else COLOR_RED
-                draw_contours(new_frame, coordinates, str(p["id"] + 1), COLOR_WHITE, color)
+            overlay.draw(new_frame, statuses)
 
             # Calculate statistics
             total_spaces = len(coordinates_data)
-            free_spaces = sum(1 for status in statuses if status)
-            occupied_spaces = total_spaces - free_spaces
+            free_spaces = state.free_count
+            occupied_spaces = state.occupied_count
 
             # Create info panel
             self.__draw_info_panel(new_frame, total_spaces, free_spaces, occupied_spaces)
@@ -243,9 +239,10 @@ class MotionDetector:
         cv2.destroyAllWindows()
 
     def __draw_info_panel(self, frame, total, free, occupied):
-        # Create semi-transparent overlay for info panel
-        overlay = frame.copy()
+        # Create semi-transparent overlay for info panel; only the panel area is blended
         panel_height = 120
+        panel = frame[:panel_height + 10, :260]
+        overlay = panel.copy()
         cv2.rectangle(overlay, (10, 10), (250, panel_height), (0, 0, 0), -1)
         
         # Add text
@@ -254,9 +251,9 @@ class MotionDetector:
         cv2.putText(overlay, f'Free Spaces: {free}', (20, 65), font, 0.6, COLOR_GREEN, 2)
         cv2.putText(overlay, f'Occupied Spaces: {occupied}', (20, 95), font, 0.6, COLOR_RED, 2)
         
-        # Apply overlay with transparency
+        # Apply overlay with transparency, writing back into the frame
         alpha = 0.7
-        frame = cv2.addWeighted(overlay, alpha, frame, 1 - alpha, 0)
+        cv2.addWeighted(overlay, alpha, panel, 1 - alpha, 0, dst=panel)
 
     def __draw_free_space_locations(self, frame, statuses, coordinates_data):
         free_spaces = []
@@ -272,32 +269,35 @@ class MotionDetector:
             y_position = frame.shape[0] - 30  # 30 pixels from bottom
             cv2.putText(frame, message, (10, y_position), font, 0.6, COLOR_WHITE, 2)
 
-    def __apply(self, grayed, index, p):
-        rect = self.bounds[index]
-        roi_gray = grayed[rect[1]:(rect[1] + rect[3]), rect[0]:(rect[0] + rect[2])]
-        laplacian = cv2.Laplacian(roi_gray, cv2.CV_64F, ksize=1)
-        
-        return np.mean(np.abs(laplacian * self.mask[index])) < self.LAPLACIAN
-
-    @staticmethod
-    def same_status(coordinates_status, index, status):
-        return status == coordinates_status[index]
+    def _laplacian_scores(self, grayed):
+        """Mean absolute Laplacian of every spot, computed in a single pass.
 
-    @staticmethod
-    def status_changed(coordinates_status, index, status):
-        return status != coordinates_status[index]
+        One Laplacian is taken over the union box of all spots and summed per
+        spot through the layout's label image. As before, the sum over the
+        spot mask is averaged over the spot's whole bounding rect.
+        """
+        layout = self.layout
+        laplacian = cv2.Laplacian(layout.union(grayed), cv2.CV_32F, ksize=1)
+        np.abs(laplacian, out=laplacian)
+        return layout.spot_sums(laplacian) / np.maximum(layout.rect_areas, 1)
 
     def get_current_status(self):
-        """Get the current status of all parking spaces"""
-        return {
-            'total_spaces': self.total_spaces,
-            'available_spaces': self.free_spaces,
-            'occupied_spaces': self.occupied_spaces,
-            'spaces': self.statuses,
-            'coordinates_data': self.coordinates_data,
-            'dimensions': self.original_dimensions,
-            'vehicle_types': ['motorcycle'] * self.occupied_spaces
-        }
+        """Get the current status of all parking spaces (from the last published snapshot)"""
+        return self.snapshot.as_dict()
+
+    def get_layout(self):
+        """Static description of the lot; it doesn't change while the detector runs"""
+        return describe_layout(self.coordinates_data, self.original_dimensions)
+
+
+def describe_layout(spots, frame_dimensions):
+    """Spot ids, coordinates and frame dimensions of a coordinates file's spots"""
+    return {
+        'total_spaces': len(spots),
+        'ids': [spot['id'] for spot in spots],
+        'coordinates_data': spots,
+        'dimensions': frame_dimensions
+    }
 
 
 class CaptureReadError(Exception):
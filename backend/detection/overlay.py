@@ -0,0 +1,82 @@
+import threading
+
+import cv2
+import numpy as np
+
+from .colors import COLOR_GREEN, COLOR_RED, COLOR_WHITE
+
+
+class OverlayRenderer:
+    """Spot outlines and labels rasterized once and pasted onto frames.
+
+    Two layers are drawn up front, one with every outline in the occupied
+    colour and one in the available colour (labels on both). Whenever the
+    statuses change, the composite is picked pixel by pixel from the layer
+    matching the owning spot's status; every frame then only needs a single
+    masked copy of the overlay's bounding box, whatever the number of spots.
+    """
+
+    def __init__(self, layout, available_color=COLOR_GREEN, occupied_color=COLOR_RED,
+                 thickness=2, label_color=COLOR_WHITE, label_anchors=None,
+                 label_offset=0, font_scale=0.5, label_thickness=None):
+        self.layout = layout
+        if label_anchors is None:
+            label_anchors = layout.label_anchors
+        if label_thickness is None:
+            label_thickness = thickness
+
+        height, width = layout.height, layout.width
+        # Outline pixels hold the 1-based index of the spot drawn last there
+        owner = np.zeros((height, width), dtype=np.uint16)
+        labels = np.zeros((height, width), dtype=np.uint8)
+        for index in range(layout.count):
+            cv2.drawContours(owner, [layout.contours[index]], -1, index + 1, thickness)
+        for index in range(layout.count):
+            cv2.putText(labels, str(layout.ids[index] + label_offset), tuple(label_anchors[index]),
+                        cv2.FONT_HERSHEY_SIMPLEX, font_scale, 255, label_thickness)
+
+        mask = (owner > 0) | (labels > 0)
+        ys, xs = np.nonzero(mask)
+        if len(ys):
+            self.box = (int(xs.min()), int(ys.min()), int(xs.max()) + 1, int(ys.max()) + 1)
+        else:
+            self.box = (0, 0, 0, 0)
+        x0, y0, x1, y1 = self.box
+
+        self.mask = mask[y0:y1, x0:x1].astype(np.uint8)
+        # Background and label pixels point at the extra "spot" at index -1
+        self.owner = owner[y0:y1, x0:x1].astype(np.int32) - 1
+        label_pixels = labels[y0:y1, x0:x1] > 0
+        self.owner[label_pixels] = -1
+
+        self.layers = np.zeros((2, y1 - y0, x1 - x0, 3), dtype=np.uint8)
+        for layer, color in zip(self.layers, (occupied_color, available_color)):
+            layer[self.owner >= 0] = color
+            layer[label_pixels] = label_color
+
+        self.statuses = None
+        self.composite = self.layers[0]
+        self.renders = 0
+        self._lock = threading.Lock()
+
+    def _compose(self, statuses):
+        with self._lock:
+            if self.statuses is None or not np.array_equal(statuses, self.statuses):
+                available = np.append(statuses, False)[self.owner]
+                self.composite = np.where(available[..., np.newaxis], self.layers[1], self.layers[0])
+                self.statuses = statuses.copy()
+                self.renders += 1
+            return self.composite
+
+    def draw(self, frame, statuses):
+        """Paste the overlay for `statuses` (True = available) onto `frame` in place"""
+        composite = self._compose(np.asarray(statuses, dtype=bool))
+        x0, y0, x1, y1 = self.box
+        # Frames smaller than the layout just get the part that fits
+        x1, y1 = min(x1, frame.shape[1]), min(y1, frame.shape[0])
+        if x1 <= x0 or y1 <= y0:
+            return frame
+        h, w = y1 - y0, x1 - x0
+        # Writes straight into the frame's region: the ROI is a view, not a copy
+        cv2.copyTo(composite[:h, :w], self.mask[:h, :w], frame[y0:y1, x0:x1])
+        return frame
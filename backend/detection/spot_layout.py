@@ -0,0 +1,121 @@
+import cv2
+import numpy as np
+
+
+class SpotLayout:
+    """Per-spot geometry compiled once from the coordinates data.
+
+    Everything the detection and drawing paths need about a spot (contour,
+    bounding rect, ROI-sized mask, centroid) is computed here at construction
+    so that per-frame work only touches the ROI pixels of each spot.
+    """
+
+    def __init__(self, spots, frame_dimensions):
+        self.width = int(frame_dimensions['width'])
+        self.height = int(frame_dimensions['height'])
+        self.count = len(spots)
+
+        self.ids = [p['id'] for p in spots]
+        self.contours = []
+        self.masks = []
+        self.rects = np.zeros((self.count, 4), dtype=np.int32)
+        self.areas = np.zeros(self.count, dtype=np.float64)
+        self.centroids = []
+        self.label_anchors = []
+
+        for index, p in enumerate(spots):
+            contour = np.array(p['coordinates'], np.int32).reshape((-1, 1, 2))
+            x, y, w, h = self._clip_rect(cv2.boundingRect(contour))
+
+            mask = np.zeros((h, w), dtype=np.uint8)
+            cv2.drawContours(mask, [contour - (x, y)], -1, 255, -1, lineType=cv2.LINE_8)
+
+            self.contours.append(contour)
+            self.masks.append(mask == 255)
+            self.rects[index] = (x, y, w, h)
+            self.areas[index] = cv2.contourArea(contour)
+            cx, cy = self._centroid(contour)
+            self.centroids.append((cx, cy))
+            self.label_anchors.append((cx - 3, cy + 3))
+
+        self.rect_areas = self.rects[:, 2].astype(np.int64) * self.rects[:, 3]
+        self._compile_labels()
+
+    def _compile_labels(self):
+        """Build a label image over the union bounding box of all spots.
+
+        Each pixel holds the index of the spot whose mask covers it, or
+        ``count`` for background. Pixels covered by more than one spot keep
+        their first label and the extra memberships are recorded as flat
+        (pixel, spot) pairs, so per-spot sums stay exact for overlapping masks.
+        """
+        if self.count == 0 or not (self.rects[:, 2:] > 0).any():
+            self.union_rect = (0, 0, 0, 0)
+            self.label_image = np.zeros((0, 0), dtype=np.int32)
+            self.overlap_pixels = np.zeros(0, dtype=np.int64)
+            self.overlap_labels = np.zeros(0, dtype=np.int32)
+            return
+
+        x0, y0 = self.rects[:, 0].min(), self.rects[:, 1].min()
+        x1 = (self.rects[:, 0] + self.rects[:, 2]).max()
+        y1 = (self.rects[:, 1] + self.rects[:, 3]).max()
+        self.union_rect = (int(x0), int(y0), int(x1 - x0), int(y1 - y0))
+
+        labels = np.full((y1 - y0, x1 - x0), self.count, dtype=np.int32)
+        overlap_pixels = []
+        overlap_labels = []
+        for index in range(self.count):
+            x, y, w, h = self.rects[index]
+            view = labels[y - y0:y - y0 + h, x - x0:x - x0 + w]
+            mask = self.masks[index]
+            taken = mask & (view != self.count)
+            if taken.any():
+                rows, cols = np.nonzero(taken)
+                overlap_pixels.append((rows + y - y0) * labels.shape[1] + cols + x - x0)
+                overlap_labels.append(np.full(len(rows), index, dtype=np.int32))
+            view[mask & ~taken] = index
+
+        self.label_image = labels
+        self.overlap_pixels = (np.concatenate(overlap_pixels) if overlap_pixels
+                               else np.zeros(0, dtype=np.int64))
+        self.overlap_labels = (np.concatenate(overlap_labels) if overlap_labels
+                               else np.zeros(0, dtype=np.int32))
+
+    def _clip_rect(self, rect):
+        """Clamp a bounding rect to the frame so ROI slices and masks agree"""
+        x, y, w, h = rect
+        x0, y0 = max(x, 0), max(y, 0)
+        x1, y1 = min(x + w, self.width), min(y + h, self.height)
+        return x0, y0, max(x1 - x0, 0), max(y1 - y0, 0)
+
+    @staticmethod
+    def _centroid(contour):
+        moments = cv2.moments(contour)
+        if moments["m00"] != 0:
+            return (int(moments["m10"] / moments["m00"]),
+                    int(moments["m01"] / moments["m00"]))
+        x, y = contour.reshape(-1, 2).mean(axis=0)
+        return int(x), int(y)
+
+    def roi(self, image, index):
+        """Return the bounding-rect view of a spot in `image` (no copy)"""
+        x, y, w, h = self.rects[index]
+        return image[y:y + h, x:x + w]
+
+    def union(self, image):
+        """Return the union-bounding-box view of `image` (no copy)"""
+        x, y, w, h = self.union_rect
+        return image[y:y + h, x:x + w]
+
+    def spot_sums(self, values):
+        """Sum a union-box-sized array over every spot mask in one pass"""
+        values = values.ravel()
+        sums = np.bincount(self.label_image.ravel(), weights=values,
+                           minlength=self.count + 1)[:self.count]
+        if len(self.overlap_pixels):
+            sums += np.bincount(self.overlap_labels, weights=values[self.overlap_pixels],
+                                minlength=self.count)
+        return sums
+
+    def __len__(self):
+        return self.count
@@ -0,0 +1,71 @@
+import numpy as np
+
+
+class SpotStateStore:
+    """Debounced per-spot status held in flat numpy arrays.
+
+    ``status`` follows the detector convention (True = available). A new
+    observation that differs from the current status only becomes the status
+    once it has been observed continuously for ``delay`` seconds; observing
+    the current status again cancels the pending change. With
+    ``adopt_first`` the very first observation is adopted immediately;
+    without it, it is debounced against ``initial`` like any other. Each
+    ``update`` is a handful of vectorized operations regardless of the number
+    of spots.
+    """
+
+    def __init__(self, count, delay=1.0, initial=False, adopt_first=True):
+        self.count = count
+        self.delay = delay
+        self.adopt_first = adopt_first
+
+        self.status = np.full(count, initial, dtype=bool)
+        self.pending = np.full(count, initial, dtype=bool)
+        self.pending_since = np.full(count, np.nan)
+        self.confidence = np.zeros(count, dtype=np.float32)
+        self.last_change = np.full(count, np.nan)
+
+        # Indices that flipped in the last update, and a counter bumped on every flip
+        self.changed = np.zeros(0, dtype=np.int64)
+        self.version = 0
+        self.updated_at = None
+
+    def update(self, observed, now, confidence=None):
+        """Feed one observation per spot; returns the indices whose status flipped"""
+        observed = np.asarray(observed, dtype=bool)
+        if confidence is not None:
+            self.confidence[:] = confidence
+
+        differs = observed != self.status
+        if self.adopt_first and self.updated_at is None:
+            # The very first observation is taken as-is rather than debounced
+            self.pending_since[differs] = -np.inf
+            self.pending[differs] = observed[differs]
+        has_pending = ~np.isnan(self.pending_since)
+
+        # Observing the current status again cancels a pending change
+        self.pending_since[has_pending & ~differs] = np.nan
+
+        # A new disagreement starts (or restarts, if it changed direction) the timer
+        start = differs & (~has_pending | (self.pending != observed))
+        self.pending_since[start] = now
+        self.pending[differs] = observed[differs]
+
+        commit = differs & (now - self.pending_since >= self.delay)
+        self.changed = np.flatnonzero(commit)
+        if len(self.changed):
+            self.status[commit] = observed[commit]
+            self.pending_since[commit] = np.nan
+            self.last_change[commit] = now
+            self.version += 1
+
+        self.updated_at = now
+        return self.changed
+
+    @property
+    def free_count(self):
+        return int(np.count_nonzero(self.status))
+
+    @property
+    def occupied_count(self):
+        return self.count - self.free_count
@@ -0,0 +1,81 @@
+import collections
+import threading
+
+import numpy as np
+
+
+class StatusFeed:
+    """Sequence-numbered stream of spot status changes.
+
+    ``update`` compares the latest statuses with the last ones it saw and,
+    if any spot flipped, records a compact delta ``{'seq', 'ts', 'changes',
+    'available_spaces', 'occupied_spaces'}`` where ``changes`` is a list of
+    ``[spot_id, available]`` pairs. The last ``history`` deltas are kept so a
+    client that missed some can catch up with ``since``; one that fell
+    further behind has to start over from ``snapshot``.
+    """
+
+    def __init__(self, ids, layout, history=256):
+        self.ids = np.asarray(ids)
+        self.layout = layout
+        self.statuses = np.zeros(len(self.ids), dtype=bool)
+        self.seq = 0
+        self.timestamp = None
+        self.deltas = collections.deque(maxlen=history)
+        self._cond = threading.Condition()
+
+    def update(self, statuses, timestamp):
+        """Record the current statuses; returns the new delta or None if nothing changed"""
+        statuses = np.asarray(statuses, dtype=bool)
+        with self._cond:
+            if self.timestamp is None:
+                changed = np.arange(len(statuses))
+            else:
+                changed = np.flatnonzero(statuses != self.statuses)
+            self.timestamp = timestamp
+            if not len(changed):
+                return None
+
+            self.statuses = statuses.copy()
+            self.seq += 1
+            available = int(np.count_nonzero(statuses))
+            delta = {
+                'seq': self.seq,
+                'ts': timestamp,
+                'changes': [[self.ids[i].item(), bool(statuses[i])] for i in changed],
+                'available_spaces': available,
+                'occupied_spaces': len(statuses) - available
+            }
+            self.deltas.append(delta)
+            self._cond.notify_all()
+            return delta
+
+    def snapshot(self):
+        """Full current state, tagged with the seq of the last delta it includes"""
+        with self._cond:
+            available = int(np.count_nonzero(self.statuses))
+            return {
+                'seq': self.seq,
+                'ts': self.timestamp,
+                'spaces': self.statuses.tolist(),
+                'total_spaces': len(self.statuses),
+                'available_spaces': available,
+                'occupied_spaces': len(self.statuses) - available
+            }
+
+    def since(self, seq):
+        """Deltas after `seq`, or None if some of them are no longer kept"""
+        with self._cond:
+            if seq == self.seq:
+                return []
+            if seq > self.seq:
+                # The client saw a previous run of the server
+                return None
+            if not self.deltas or self.deltas[0]['seq'] > seq + 1:
+                return None
+            return [delta for delta in self.deltas if delta['seq'] > seq]
+
+    def wait(self, seq, timeout=None):
+        """Block until there is a delta after `seq`; returns False on timeout"""
+        with self._cond:
+            return self._cond.wait_for(lambda: self.seq > seq, timeout)
@@ -0,0 +1,87 @@
+import json
+import math
+import struct
+import threading
+
+import numpy as np
+
+# Binary status header: format version, snapshot seq, timestamp (NaN if
+# unknown), total spaces, available spaces; followed by one bit per spot,
+# set if occupied, least significant bit first.
+BINARY_VERSION = 1
+BINARY_HEADER = struct.Struct('<BIdHH')
+
+
+class StatusSnapshot:
+    """Immutable view of the detector's state at one point in time.
+
+    The detector builds a complete snapshot and then publishes it by
+    replacing a single attribute, so readers on other threads always see a
+    whole snapshot without taking any lock the detector uses. Serialized
+    forms are built at most once per snapshot and kept on it (``json`` and
+    ``memo``).
+    """
+
+    __slots__ = ('seq', 'version', 'timestamp', 'statuses', 'confidence', 'total_spaces',
+                 'available_spaces', 'occupied_spaces', '_memo', '_lock')
+
+    def __init__(self, seq, version, timestamp, statuses, confidence=None):
+        statuses = np.array(statuses, dtype=bool)
+        statuses.flags.writeable = False
+        if confidence is not None:
+            confidence = np.array(confidence, dtype=np.float32)
+            confidence.flags.writeable = False
+
+        self.seq = seq
+        # Changes only when some spot's status does (SpotStateStore.version)
+        self.version = version
+        self.timestamp = timestamp
+        self.statuses = statuses
+        # Per-spot foreground fraction behind the statuses, if the detector has one
+        self.confidence = confidence
+        self.total_spaces = len(statuses)
+        self.available_spaces = int(np.count_nonzero(statuses))
+        self.occupied_spaces = self.total_spaces - self.available_spaces
+        self._memo = {}
+        self._lock = threading.Lock()
+
+    def __reduce__(self):
+        # Sent between processes without the cached serializations
+        return (StatusSnapshot, (self.seq, self.version, self.timestamp, self.statuses, self.confidence))
+
+    def as_dict(self):
+        """The detector's status dict (a new dict on every call).
+
+        The static layout is not part of it; see ``MotionDetector.get_layout``.
+        """
+        return {
+            'total_spaces': self.total_spaces,
+            'available_spaces': self.available_spaces,
+            'occupied_spaces': self.occupied_spaces,
+            'spaces': self.statuses.tolist(),
+            'vehicle_types': ['motorcycle'] * self.occupied_spaces
+        }
+
+    def memo(self, key, build):
+        """Value of `build()` computed once for this snapshot and `key`"""
+        value = self._memo.get(key)
+        if value is None:
+            with self._lock:
+                value = self._memo.get(key)
+                if value is None:
+                    value = self._memo[key] = build()
+        return value
+
+    def json(self):
+        """``as_dict()`` serialized to a JSON string, built once"""
+        return self.memo('json', lambda: json.dumps(self.as_dict()))
+
+    def to_bytes(self):
+        """Compact binary form: BINARY_HEADER followed by the occupancy bitset"""
+        return self.memo('bytes', self._pack)
+
+    def _pack(self):
+        timestamp = self.timestamp if self.timestamp is not None else math.nan
+        header = BINARY_HEADER.pack(BINARY_VERSION, self.seq & 0xFFFFFFFF, timestamp,
+                                    self.total_spaces, self.available_spaces)
+        return header + np.packbits(~self.statuses, bitorder='little').tobytes()
@@ -5,6 +5,12 @@ db = SQLAlchemy()
 
 class VehicleEntry(db.Model):
     __tablename__ = 'vehicle_entries'
+    # Keyset pagination walks (entry_time, id) newest first, optionally within a status or slot
+    __table_args__ = (
+        db.Index('ix_vehicle_entries_entry_id', 'entry_time', 'id'),
+        db.Index('ix_vehicle_entries_status_entry_id', 'status', 'entry_time', 'id'),
+        db.Index('ix_vehicle_entries_slot_entry_id', 'parking_slot', 'entry_time', 'id'),
+    )
     
     id = db.Column(db.Integer, primary_key=True)
     ticket_number = db.Column(db.String(20), unique=True, nullable=False)
@@ -16,4 +22,59 @@ class VehicleEntry(db.Model):
     driver_name = db.Column(db.String(100), nullable=False)
     contact_number = db.Column(db.String(20), nullable=False)
     status = db.Column(db.String(20), default='Active')
-    created_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow) 
\ No newline at end of file
+    created_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow) 
+
+class SpotTransition(db.Model):
+    """A parking spot changing state, as seen by one camera's detector"""
+    __tablename__ = 'spot_transitions'
+    __table_args__ = (
+        db.Index('ix_spot_transitions_camera_spot_time', 'camera', 'spot_id', 'timestamp'),
+        db.Index('ix_spot_transitions_time', 'timestamp'),
+    )
+
+    id = db.Column(db.Integer, primary_key=True)
+    camera = db.Column(db.String(50), nullable=False)
+    spot_id = db.Column(db.Integer, nullable=False)
+    # New state of the spot: True = available, as in the detector
+    available = db.Column(db.Boolean, nullable=False)
+    timestamp = db.Column(db.DateTime, nullable=False)
+    # Foreground fraction of the spot the detector saw when it flipped
+    confidence = db.Column(db.Float, nullable=True)
+
+class SpotOccupancyRollup(db.Model):
+    """Occupancy of one spot over a minute, hour or day, kept up to date by the history writer"""
+    __tablename__ = 'spot_occupancy_rollups'
+
+    granularity = db.Column(db.String(10), primary_key=True)
+    bucket_start = db.Column(db.DateTime, primary_key=True)
+    camera = db.Column(db.String(50), primary_key=True)
+    spot_id = db.Column(db.Integer, primary_key=True, autoincrement=False)
+    occupied_seconds = db.Column(db.Float, nullable=False, default=0)
+    # Times the spot became occupied (turnover) and available again
+    arrivals = db.Column(db.Integer, nullable=False, default=0)
+    departures = db.Column(db.Integer, nullable=False, default=0)
+
+class LotOccupancyRollup(db.Model):
+    """Occupancy of a camera's whole lot over a minute, hour or day"""
+    __tablename__ = 'lot_occupancy_rollups'
+
+    granularity = db.Column(db.String(10), primary_key=True)
+    bucket_start = db.Column(db.DateTime, primary_key=True)
+    camera = db.Column(db.String(50), primary_key=True)
+    # Seconds of the bucket the camera was being watched, and spot-seconds occupied in them
+    observed_seconds = db.Column(db.Float, nullable=False, default=0)
+    occupied_seconds = db.Column(db.Float, nullable=False, default=0)
+    peak_occupied = db.Column(db.Integer, nullable=False, default=0)
+    spots = db.Column(db.Integer, nullable=False, default=0)
+    arrivals = db.Column(db.Integer, nullable=False, default=0)
+    departures = db.Column(db.Integer, nullable=False, default=0)
+
+def ensure_indexes():
+    """Create indexes declared on the models that an existing database lacks.
+
+    db.create_all() only creates missing tables, so indexes added to a table
+    that already exists would otherwise never be built.
+    """
+    for table in db.metadata.sorted_tables:
+        for index in table.indexes:
+            index.create(bind=db.engine, checkfirst=True)
\ No newline at end of file
@@ -0,0 +1,99 @@
+"""Production entry point.
+
+    python -m backend.serve [--host 0.0.0.0] [--port 5000] [--encode-workers 2]
+
+Serves the app from a single gevent process: every request, MJPEG/SSE
+stream and Socket.IO connection is a greenlet, so hundreds of long-lived
+viewers cost a few kilobytes each instead of an OS thread. Detection runs in
+a CameraManager worker process (DETECTION_MODE = 'process'), so video
+decoding and OpenCV work never block the event loop; JPEG encodes run on a
+small pool of native threads.
+
+Database access has to be cooperative too. mysqlclient (``mysql://``) is a
+C driver gevent can't patch: every query would stall the whole process, so
+every stream and long-poll with it. A ``mysql://`` or ``mysql+mysqldb://``
+URI is therefore served through PyMySQL (``mysql+pymysql://``), which is
+pure Python and yields while it waits on the server.
+
+Worker settings:
+  * one server process: frames, status snapshots and the SSE/Socket.IO
+    feeds live in its memory, so do not put several of these behind a
+    load balancer without sticky sessions;
+  * --encode-workers: native threads for JPEG encoding (1-2 per core);
+  * PIPELINE_WORKERS / PIPELINE_QUEUE_SIZE in config.py tune the detection
+    pipeline inside the worker process.
+"""
+import argparse
+import os
+import signal
+import sys
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description='Parking system production server')
+    parser.add_argument("--host", default="0.0.0.0")
+    parser.add_argument("--port", type=int, default=5000)
+    parser.add_argument("--encode-workers", type=int, default=2,
+                        help="Native threads used for JPEG encoding")
+    parser.add_argument("--start-detection", action="store_true",
+                        help="Start detection right away instead of on /api/start-detection")
+    return parser.parse_args()
+
+
+def cooperative_database_uri(uri):
+    """`uri` with a MySQL driver gevent can patch"""
+    for prefix in ('mysql://', 'mysql+mysqldb://'):
+        if uri.startswith(prefix):
+            return 'mysql+pymysql://' + uri[len(prefix):]
+    return uri
+
+
+def main():
+    args = parse_args()
+
+    # Has to happen before anything else imports socket, threading or time.
+    # Kept out of module scope: spawned camera workers import this module too.
+    from gevent import monkey
+    monkey.patch_all()
+    import gevent
+    from gevent.threadpool import ThreadPoolExecutor
+
+    sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+    from backend.config import Config
+    Config.DETECTION_MODE = 'process'
+    Config.SOCKETIO_ASYNC_MODE = 'gevent'
+    Config.SQLALCHEMY_DATABASE_URI = cooperative_database_uri(Config.SQLALCHEMY_DATABASE_URI)
+
+    from backend.app import create_app
+    from backend.api import routes
+    from backend.api.socket_events import socketio
+
+    # gevent's executor runs encodes on real threads (cv2 releases the GIL)
+    # while the waiting request greenlet yields to the others
+    routes.jpeg_encoder.pool = ThreadPoolExecutor(args.encode_workers)
+
+    server_greenlet = gevent.getcurrent()
+
+    def shutdown():
+        # Camera workers are separate processes; stop them before going away.
+        # Runs in its own greenlet (a plain signal handler would run inside
+        # the hub, where the joins in close() can't block)
+        if routes.camera_manager is not None:
+            routes.camera_manager.close()
+        gevent.kill(server_greenlet, SystemExit)
+
+    gevent.signal_handler(signal.SIGTERM, shutdown)
+    gevent.signal_handler(signal.SIGINT, shutdown)
+
+    app = create_app()
+    if args.start_detection:
+        with app.test_request_context():
+            routes.start_detection()
+
+    print(f"Starting production server on http://{args.host}:{args.port}")
+    socketio.run(app, host=args.host, port=args.port, log_output=False)
+
+
+if __name__ == '__main__':
+    main()
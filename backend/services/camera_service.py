@@ -0,0 +1,333 @@
+import atexit
+import multiprocessing
+import os
+import threading
+import time
+
+import yaml
+
+from backend.video.shm_ring import SharedFrameRing
+from backend.video.encoder import JpegEncoder
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def resolve_path(path):
+    """Resolve config paths relative to the backend directory"""
+    if os.path.isabs(path):
+        return path
+    return os.path.normpath(os.path.join(BACKEND_DIR, path))
+
+
+def load_cameras(config):
+    """Read the configured cameras as {camera_id: camera dict}"""
+    cameras = getattr(config, 'CAMERAS', None) or [{
+        'id': 'main',
+        'source': config.VIDEO_SOURCE,
+        'coordinates': config.COORDINATES_PATH
+    }]
+
+    result = {}
+    for camera in cameras:
+        camera = dict(camera)
+        camera['id'] = str(camera['id'])
+        camera['coordinates'] = resolve_path(camera['coordinates'])
+        camera.setdefault('start_frame', config.START_FRAME)
+        result[camera['id']] = camera
+    return result
+
+
+def load_dimensions(camera):
+    with open(camera['coordinates'], "r") as data:
+        points = yaml.load(data, Loader=yaml.SafeLoader)
+    dimensions = points['frame_dimensions']
+    return int(dimensions['height']), int(dimensions['width'])
+
+
+def load_spot_ids(camera):
+    with open(camera['coordinates'], "r") as data:
+        points = yaml.load(data, Loader=yaml.SafeLoader)
+    return [spot['id'] for spot in points['spots']]
+
+
+def camera_worker(camera, conn, stop_event, workers, queue_size, ring_name):
+    """Entry point of a camera's worker process.
+
+    Runs the detection pipeline for one camera and writes every rendered
+    frame into the shared-memory ring `ring_name`. Only small messages
+    (ring sequence number, status, stats) go back to the parent over `conn`.
+    The worker stops on its own once the parent is gone: a send fails or
+    it has been re-parented.
+    """
+    # Imported here so the parent doesn't load the detector just to manage workers
+    from backend.detection.motion_detector import MotionDetector
+    from backend.video.runner import DetectionRunner
+
+    runner = None
+    ring = SharedFrameRing.attach(ring_name)
+    last_stats = [0.0]
+    parent_pid = os.getppid()
+
+    def publish(packet):
+        message = {
+            'type': 'frame',
+            'ring_seq': ring.write(packet['frame'], packet['captured_at']),
+            'captured_at': packet['captured_at'],
+            'status': packet.get('status')
+        }
+        now = time.time()
+        if now - last_stats[0] >= 1.0:
+            message['stats'] = runner.stats()
+            last_stats[0] = now
+        try:
+            conn.send(message)
+        except (OSError, EOFError):
+            # Nobody is reading any more; the pipeline stage would otherwise
+            # catch this and carry on detecting for no one
+            print(f"Camera {camera['id']} lost its parent, stopping")
+            stop_event.set()
+
+    try:
+        with open(camera['coordinates'], "r") as data:
+            points = yaml.load(data, Loader=yaml.SafeLoader)
+        detector = MotionDetector(camera['source'], points, camera['start_frame'])
+
+        runner = DetectionRunner(
+            detector,
+            camera['source'],
+            publish,
+            start_frame=camera['start_frame'],
+            workers=workers,
+            queue_size=queue_size
+        )
+        runner.start()
+        runner.run(lambda: not stop_event.is_set() and os.getppid() == parent_pid)
+    except Exception as e:
+        print(f"Camera {camera['id']} worker error: {e}")
+        try:
+            conn.send({'type': 'error', 'error': str(e)})
+        except (OSError, ValueError):
+            pass
+    finally:
+        if runner is not None:
+            runner.stop()
+        conn.close()
+        ring.close()
+
+
+class CameraWorker:
+    """Parent-side handle of one camera's worker process.
+
+    Owns the shared-memory frame ring the worker writes into. Frames are
+    JPEG-encoded here only when requested, at most once per frame and tier.
+    """
+
+    def __init__(self, camera, context, workers=None, queue_size=2, ring_slots=4, encoder=None):
+        self.camera = camera
+        self.id = camera['id']
+        self.context = context
+        self.workers = workers or {}
+        self.queue_size = queue_size
+        self.ring_slots = ring_slots
+        self.encoder = encoder or JpegEncoder()
+
+        self._lock = threading.Lock()
+        self._frame_ready = threading.Condition(self._lock)
+        self._encode_lock = threading.Lock()
+        self.process = None
+        self.stop_event = None
+        self.reader = None
+        self.ring = None
+
+        self.status = None
+        self.ring_seq = 0
+        self.seq = 0
+        self.captured_at = None
+        self.stats = {}
+        self.error = None
+        # Called as listener(worker, message) for every frame message
+        self.listeners = []
+        self._jpegs = {}
+        self._jpeg_seq = 0
+        self._spot_ids = None
+
+    @property
+    def spot_ids(self):
+        """Ids of the camera's spots, in the order of its status arrays"""
+        if self._spot_ids is None:
+            self._spot_ids = load_spot_ids(self.camera)
+        return self._spot_ids
+
+    def start(self):
+        if self.is_running():
+            return
+        if self.ring is None:
+            # Kept across restarts so readers never see it disappear under them
+            self.ring = SharedFrameRing.create(load_dimensions(self.camera) + (3,), self.ring_slots)
+        receiver, sender = self.context.Pipe(duplex=False)
+        self.stop_event = self.context.Event()
+        self.error = None
+
+        self.process = self.context.Process(
+            target=camera_worker,
+            args=(self.camera, sender, self.stop_event, self.workers, self.queue_size, self.ring.name),
+            name=f"camera-{self.id}",
+            daemon=True
+        )
+        self.process.start()
+        # The child owns the sending end now
+        sender.close()
+
+        self.reader = threading.Thread(target=self._read, args=(receiver,), daemon=True)
+        self.reader.start()
+
+    def stop(self, timeout=5.0):
+        if self.process is None:
+            return
+        self.stop_event.set()
+        self.process.join(timeout)
+        if self.process.is_alive():
+            self.process.terminate()
+            self.process.join()
+        if self.reader is not None:
+            self.reader.join(timeout)
+        self.process = None
+        self.reader = None
+
+    def restart(self):
+        self.stop()
+        self.start()
+
+    def is_running(self):
+        return self.process is not None and self.process.is_alive()
+
+    def _read(self, conn):
+        try:
+            while True:
+                # poll() waits cooperatively; recv() then returns immediately
+                if not conn.poll(0.5):
+                    if self.process is None or not self.process.is_alive():
+                        break
+                    continue
+                message = conn.recv()
+                self._handle(message)
+        except (EOFError, OSError):
+            pass
+        finally:
+            conn.close()
+
+    def _handle(self, message):
+        if message['type'] == 'error':
+            self.error = message['error']
+            return
+
+        with self._lock:
+            self.ring_seq = message['ring_seq']
+            # Numbered here, not by the worker, so restarts never go backwards
+            self.seq += 1
+            self.captured_at = message['captured_at']
+            if message.get('status') is not None:
+                self.status = message['status']
+            if 'stats' in message:
+                self.stats = message['stats']
+            self._frame_ready.notify_all()
+
+        for listener in self.listeners:
+            listener(self, message)
+
+    def snapshot(self, width=None, quality=None):
+        """Latest (status, jpeg, seq) received from the worker"""
+        with self._lock:
+            status, ring_seq, seq = self.status, self.ring_seq, self.seq
+        return status, self._encode(ring_seq, width, quality), seq
+
+    def wait_frame(self, after_seq, timeout=1.0, width=None, quality=None):
+        """Block until a frame newer than `after_seq` arrives; ``(seq, jpeg)`` or None on timeout"""
+        with self._lock:
+            if not self._frame_ready.wait_for(lambda: self.seq > after_seq, timeout):
+                return None
+            ring_seq, seq = self.ring_seq, self.seq
+        jpeg = self._encode(ring_seq, width, quality)
+        return (seq, jpeg) if jpeg is not None else None
+
+    def _encode(self, ring_seq, width=None, quality=None):
+        """JPEG of the newest ring frame at or after `ring_seq`, encoded at most once per tier"""
+        if not ring_seq:
+            return None
+        tier = self.encoder.tier(width, quality)
+        with self._encode_lock:
+            if self._jpeg_seq >= ring_seq and tier in self._jpegs:
+                return self._jpegs[tier]
+
+            # The worker may have moved on already; a newer frame is just as good
+            item = self.ring.latest()
+            if item is None:
+                return self._jpegs.get(tier)
+            seq, _, view = item
+            jpeg = self.encoder.encode(view, *tier)
+            if not self.ring.is_valid(seq):
+                # Overwritten mid-encode: keep serving the previous frame, not a torn one
+                return self._jpegs.get(tier)
+            if seq != self._jpeg_seq:
+                self._jpegs, self._jpeg_seq = {}, seq
+            self._jpegs[tier] = jpeg
+            return jpeg
+
+    def close(self):
+        self.stop()
+        if self.ring is not None:
+            self.ring.close()
+            self.ring = None
+
+    def info(self):
+        # The source is left out on purpose: RTSP URLs carry credentials
+        return {
+            'id': self.id,
+            'running': self.is_running(),
+            'pid': self.process.pid if self.process is not None else None,
+            'seq': self.seq,
+            'error': self.error,
+            'stats': self.stats
+        }
+
+
+class CameraManager:
+    """Runs one detection worker process per configured camera.
+
+    Each camera is started, stopped and restarted independently; a crash or
+    restart of one worker does not touch the others.
+    """
+
+    def __init__(self, cameras, workers=None, queue_size=2, ring_slots=4, encoder=None):
+        # Spawn rather than fork: the web server process already runs threads
+        context = multiprocessing.get_context('spawn')
+        self.workers = {
+            camera_id: CameraWorker(camera, context, workers, queue_size, ring_slots, encoder)
+            for camera_id, camera in cameras.items()
+        }
+        atexit.register(self.close)
+
+    def get(self, camera_id):
+        """Return the worker for `camera_id`; raises KeyError if unknown"""
+        return self.workers[camera_id]
+
+    def start(self, camera_id):
+        self.get(camera_id).start()
+
+    def stop(self, camera_id):
+        self.get(camera_id).stop()
+
+    def restart(self, camera_id):
+        self.get(camera_id).restart()
+
+    def stop_all(self):
+        for worker in self.workers.values():
+            worker.stop()
+
+    def close(self):
+        """Stop every worker and release the shared-memory rings"""
+        for worker in self.workers.values():
+            worker.close()
+
+    def list(self):
+        return [worker.info() for worker in self.workers.values()]
@@ -0,0 +1,234 @@
+import atexit
+import collections
+import threading
+import time
+from datetime import datetime
+
+import numpy as np
+
+from backend.models import db, SpotTransition
+from .rollups import OccupancyRollup
+
+OVERFLOW_POLICIES = ('drop_oldest', 'drop_newest')
+
+
+class HistoryWriter:
+    """Buffers spot transitions in memory and writes them to the database in batches.
+
+    ``record`` is called on the detection side with every published
+    StatusSnapshot. It only compares the statuses with the previous ones of
+    that camera and queues the spots that flipped, so it never waits on the
+    database. A background thread flushes the queue with one multi-row
+    INSERT every ``flush_interval`` seconds, or sooner once ``flush_events``
+    transitions are waiting.
+
+    The queue holds at most ``buffer_size`` transitions. When the database
+    can't keep up, ``overflow`` decides what is lost: ``drop_oldest`` keeps
+    the most recent history, ``drop_newest`` keeps what was queued first.
+    Either way the number lost is counted in ``dropped``.
+
+    Each flush also folds the transitions into the occupancy rollups, in the
+    same transaction. A camera whose snapshots stop for more than
+    ``max_gap`` seconds is taken to have been stopped, and that time is left
+    out of the rollups.
+    """
+
+    def __init__(self, app=None, buffer_size=10000, flush_interval=5.0, flush_events=200,
+                 overflow='drop_oldest', max_gap=30.0):
+        self.app = None
+        self.buffer_size = buffer_size
+        self.flush_interval = flush_interval
+        self.flush_events = flush_events
+        self.overflow = overflow
+        self.max_gap = max_gap
+        self.rollup = OccupancyRollup()
+
+        self._buffer = collections.deque()
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._flush_lock = threading.Lock()
+        self._thread = None
+        self._stop = threading.Event()
+        self._last = {}
+        # Newest snapshot time per camera, and (camera, stopped, resumed) of every gap
+        self._seen = {}
+        self._gaps = []
+        self._flushed_seen = {}
+
+        self.recorded = 0
+        self.written = 0
+        self.dropped = 0
+        self.failed_flushes = 0
+        self.last_flush_ms = 0.0
+        self.last_error = None
+
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        """Configure from the app's HISTORY_* settings and start the flush thread"""
+        config = app.config
+        self.buffer_size = config.get('HISTORY_BUFFER_SIZE', self.buffer_size)
+        self.flush_interval = config.get('HISTORY_FLUSH_INTERVAL', self.flush_interval)
+        self.flush_events = config.get('HISTORY_FLUSH_EVENTS', self.flush_events)
+        self.overflow = config.get('HISTORY_OVERFLOW', self.overflow)
+        self.max_gap = config.get('HISTORY_MAX_GAP', self.max_gap)
+        if self.overflow not in OVERFLOW_POLICIES:
+            raise ValueError(f"HISTORY_OVERFLOW must be one of {OVERFLOW_POLICIES}")
+        self.app = app
+        self.start()
+
+    def start(self):
+        if self._thread is not None:
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name='history-writer', daemon=True)
+        self._thread.start()
+        atexit.register(self.close)
+
+    def close(self):
+        """Stop the flush thread and write whatever is still queued"""
+        if self._thread is None:
+            return
+        self._stop.set()
+        self._wake.set()
+        self._thread.join()
+        self._thread = None
+        self.flush()
+
+    def record(self, camera, ids, snapshot):
+        """Queue the spots of `camera` whose status differs from its last snapshot.
+
+        The first snapshot seen for a camera records every spot, so history
+        always starts from a known state. Snapshots without a timestamp (no
+        frame processed yet) are ignored.
+        """
+        if snapshot is None or snapshot.timestamp is None:
+            return
+        last_seen = self._seen.get(camera)
+        if last_seen is not None and snapshot.timestamp - last_seen > self.max_gap:
+            with self._lock:
+                self._gaps.append((camera, last_seen, snapshot.timestamp))
+        self._seen[camera] = snapshot.timestamp
+
+        statuses = snapshot.statuses
+        last = self._last.get(camera)
+        if last is None or len(last) != len(statuses):
+            changed = np.arange(len(statuses))
+        else:
+            changed = np.flatnonzero(statuses != last)
+        self._last[camera] = statuses
+        if not len(changed):
+            return
+
+        confidence = snapshot.confidence
+        rows = [(
+            camera,
+            ids[index],
+            bool(statuses[index]),
+            snapshot.timestamp,
+            float(confidence[index]) if confidence is not None else None
+        ) for index in changed]
+
+        with self._lock:
+            self.recorded += len(rows)
+            self._enqueue(rows)
+            pending = len(self._buffer)
+        if pending >= self.flush_events:
+            self._wake.set()
+
+    def _enqueue(self, rows, front=False):
+        # Called with the lock held. `front` puts the rows ahead of the queue:
+        # a failed batch is older than anything recorded since
+        if len(self._buffer) + len(rows) <= self.buffer_size:
+            if front:
+                self._buffer.extendleft(reversed(rows))
+            else:
+                self._buffer.extend(rows)
+            return
+        queued = rows + list(self._buffer) if front else list(self._buffer) + rows
+        excess = len(queued) - self.buffer_size
+        queued = queued[excess:] if self.overflow == 'drop_oldest' else queued[:self.buffer_size]
+        self.dropped += excess
+        self._buffer = collections.deque(queued)
+
+    def _run(self):
+        while not self._stop.is_set():
+            self._wake.wait(self.flush_interval)
+            self._wake.clear()
+            if self._stop.is_set():
+                break
+            if self.flush() is None:
+                # Back off for a whole interval instead of retrying on every wake-up
+                self._stop.wait(self.flush_interval)
+
+    def flush(self):
+        """Write every queued transition with one INSERT and update the rollups.
+
+        Returns the number written, or None if the write failed (the
+        transitions are then queued again).
+        """
+        with self._flush_lock:
+            with self._lock:
+                rows = list(self._buffer)
+                self._buffer.clear()
+                gaps, self._gaps = self._gaps, []
+            seen = dict(self._seen)
+            if self.app is None or not (rows or gaps or seen != self._flushed_seen):
+                return 0
+
+            started = time.perf_counter()
+            try:
+                with self.app.app_context():
+                    cameras = self._write(rows, gaps, seen)
+            except Exception as e:
+                print(f"History flush of {len(rows)} transitions failed: {e}")
+                self.failed_flushes += 1
+                self.last_error = str(e)
+                self._requeue(rows, gaps)
+                return None
+            self.rollup.commit(cameras)
+            self._flushed_seen = seen
+            self.last_flush_ms = (time.perf_counter() - started) * 1000
+            with self._lock:
+                self.written += len(rows)
+            return len(rows)
+
+    def _write(self, rows, gaps, seen):
+        try:
+            if rows:
+                db.session.execute(SpotTransition.__table__.insert(), [{
+                    'camera': camera,
+                    'spot_id': spot_id,
+                    'available': available,
+                    'timestamp': datetime.fromtimestamp(timestamp),
+                    'confidence': confidence
+                } for camera, spot_id, available, timestamp, confidence in rows])
+            cameras = self.rollup.apply(rows, gaps, seen)
+            db.session.commit()
+            return cameras
+        except Exception:
+            db.session.rollback()
+            raise
+
+    def _requeue(self, rows, gaps):
+        # Retried on the next flush, ahead of anything recorded meanwhile
+        with self._lock:
+            self._enqueue(rows, front=True)
+            self._gaps[:0] = gaps
+
+    def stats(self):
+        with self._lock:
+            return {
+                'queued': len(self._buffer),
+                'capacity': self.buffer_size,
+                'recorded': self.recorded,
+                'written': self.written,
+                'dropped': self.dropped,
+                'failed_flushes': self.failed_flushes,
+                'last_flush_ms': self.last_flush_ms,
+                'last_error': self.last_error
+            }
+
+
+history_writer = HistoryWriter()
@@ -0,0 +1,297 @@
+from datetime import datetime, timedelta
+
+from backend.models import db, SpotOccupancyRollup, LotOccupancyRollup
+
+# Rollup bucket sizes, smallest first
+GRANULARITIES = {
+    'minute': timedelta(minutes=1),
+    'hour': timedelta(hours=1),
+    'day': timedelta(days=1)
+}
+
+SPOT_FIELDS = {'occupied_seconds': 'sum', 'arrivals': 'sum', 'departures': 'sum'}
+LOT_FIELDS = {'observed_seconds': 'sum', 'occupied_seconds': 'sum', 'peak_occupied': 'max',
+              'spots': 'max', 'arrivals': 'sum', 'departures': 'sum'}
+
+
+def bucket_start(moment, granularity):
+    if granularity == 'minute':
+        return moment.replace(second=0, microsecond=0)
+    if granularity == 'hour':
+        return moment.replace(minute=0, second=0, microsecond=0)
+    return moment.replace(hour=0, minute=0, second=0, microsecond=0)
+
+
+def split_interval(start, end):
+    """``(granularity, bucket_start, seconds)`` for every bucket that [start, end) overlaps"""
+    for granularity, step in GRANULARITIES.items():
+        bucket = bucket_start(start, granularity)
+        while bucket < end:
+            following = bucket + step
+            seconds = (min(end, following) - max(start, bucket)).total_seconds()
+            if seconds > 0:
+                yield granularity, bucket, seconds
+            bucket = following
+
+
+class OccupancyRollup:
+    """Folds flushed spot transitions into the minute/hour/day rollup tables.
+
+    For every camera it remembers each spot's state and the time up to
+    which that state has been counted. Each flush advances that time to the
+    newest transition or snapshot seen and adds the elapsed seconds to the
+    buckets they fall in, so a rollup row is only ever incremented, never
+    recomputed from the raw history. Time the camera wasn't running (a gap
+    reported by the writer) is not counted at all.
+    """
+
+    def __init__(self):
+        self.cameras = {}
+
+    def apply(self, rows, gaps, seen):
+        """Add `rows` (transitions), `gaps` and the latest `seen` snapshot times to the rollups.
+
+        A gap is ``(camera, stopped, resumed)``: nothing is counted between
+        the two timestamps.
+
+        Runs inside the flush's transaction and returns the new per-camera
+        state; pass it to ``commit`` once the transaction has committed.
+        """
+        cameras = {
+            camera: {'spots': dict(state['spots']), 'since': state['since']}
+            for camera, state in self.cameras.items()
+        }
+        spot_deltas = {}
+        lot_deltas = {}
+
+        # A gap sorts after transitions of the instant the camera stopped at
+        events = [(timestamp, 0, camera, spot_id, available)
+                  for camera, spot_id, available, timestamp, _ in rows]
+        events.extend((stopped, 1, camera, None, resumed) for camera, stopped, resumed in gaps)
+        events.sort(key=lambda event: event[:2])
+
+        # `value` is the new state of a transition, or the end of a gap
+        for timestamp, is_gap, camera, spot_id, value in events:
+            state = cameras.setdefault(camera, {'spots': {}, 'since': None})
+            moment = datetime.fromtimestamp(timestamp)
+            self._advance(state, camera, moment, spot_deltas, lot_deltas)
+            if is_gap:
+                # Counting picks up again from the first snapshot after the gap
+                state['since'] = datetime.fromtimestamp(value)
+                continue
+
+            previous = state['spots'].get(spot_id)
+            state['spots'][spot_id] = value
+            if previous is None or previous == value:
+                continue
+            field = 'departures' if value else 'arrivals'
+            occupied = sum(1 for value in state['spots'].values() if not value)
+            for granularity in GRANULARITIES:
+                bucket = bucket_start(moment, granularity)
+                self._delta(spot_deltas, SPOT_FIELDS, granularity, bucket, camera, spot_id)[field] += 1
+                lot = self._delta(lot_deltas, LOT_FIELDS, granularity, bucket, camera)
+                lot[field] += 1
+                lot['peak_occupied'] = max(lot['peak_occupied'], occupied)
+
+        for camera, timestamp in seen.items():
+            if camera in cameras:
+                self._advance(cameras[camera], camera, datetime.fromtimestamp(timestamp),
+                              spot_deltas, lot_deltas)
+
+        self._upsert(SpotOccupancyRollup, SPOT_FIELDS, spot_deltas)
+        self._upsert(LotOccupancyRollup, LOT_FIELDS, lot_deltas)
+        return cameras
+
+    def commit(self, cameras):
+        self.cameras = cameras
+
+    def _advance(self, state, camera, moment, spot_deltas, lot_deltas):
+        # Count the current states from `since` up to `moment`; events that
+        # arrive slightly out of order are treated as happening at `since`
+        since = state['since']
+        if since is not None and moment > since:
+            spots = state['spots']
+            occupied = [spot_id for spot_id, available in spots.items() if not available]
+            for granularity, bucket, seconds in split_interval(since, moment):
+                lot = self._delta(lot_deltas, LOT_FIELDS, granularity, bucket, camera)
+                lot['observed_seconds'] += seconds
+                lot['occupied_seconds'] += seconds * len(occupied)
+                lot['peak_occupied'] = max(lot['peak_occupied'], len(occupied))
+                lot['spots'] = max(lot['spots'], len(spots))
+                for spot_id in occupied:
+                    self._delta(spot_deltas, SPOT_FIELDS, granularity, bucket, camera, spot_id)['occupied_seconds'] += seconds
+        if since is None or moment > since:
+            state['since'] = moment
+
+    @staticmethod
+    def _delta(deltas, fields, *key):
+        delta = deltas.get(key)
+        if delta is None:
+            delta = deltas[key] = dict.fromkeys(fields, 0)
+        return delta
+
+    @staticmethod
+    def _upsert(model, fields, deltas):
+        """Add `deltas` to the rollup rows: one SELECT, one batched UPDATE and one batched INSERT"""
+        if not deltas:
+            return
+        table = model.__table__
+        keys = [column.name for column in table.primary_key.columns]
+
+        # Only the bucket range this flush touched, per granularity
+        ranges = {}
+        for key in deltas:
+            low, high = ranges.get(key[0], (key[1], key[1]))
+            ranges[key[0]] = (min(low, key[1]), max(high, key[1]))
+        existing = set(tuple(row) for row in db.session.execute(
+            db.select(*[table.c[name] for name in keys]).where(db.or_(*[
+                db.and_(table.c.granularity == granularity, table.c.bucket_start.between(low, high))
+                for granularity, (low, high) in ranges.items()
+            ]))
+        ))
+
+        updates = []
+        inserts = []
+        for key, delta in deltas.items():
+            row = dict(zip(keys, key))
+            if key in existing:
+                updates.append({**{f'k_{name}': value for name, value in row.items()},
+                                **{f'd_{name}': value for name, value in delta.items()}})
+            else:
+                inserts.append({**row, **delta})
+
+        if updates:
+            values = {}
+            for name, combine in fields.items():
+                param = db.bindparam(f'd_{name}')
+                if combine == 'sum':
+                    values[name] = table.c[name] + param
+                else:
+                    values[name] = db.case((table.c[name] < param, param), else_=table.c[name])
+            statement = table.update().where(db.and_(*[
+                table.c[name] == db.bindparam(f'k_{name}') for name in keys
+            ])).values(values)
+            db.session.execute(statement, updates)
+        if inserts:
+            db.session.execute(table.insert(), inserts)
+
+
+def pick_granularity(start, end, max_buckets):
+    """Smallest granularity that covers [start, end) in at most `max_buckets` buckets"""
+    for granularity, step in GRANULARITIES.items():
+        if (end - start) / step <= max_buckets:
+            return granularity
+    return 'day'
+
+
+def occupancy_report(start, end, granularity, camera=None, by='lot', spot_id=None, spot_ids=None):
+    """Occupancy between `start` and `end` from the rollup tables.
+
+    ``by='lot'`` gives one series per camera with average occupancy
+    (occupied spot-seconds over watched spot-seconds), peak occupied spots,
+    arrivals and departures per bucket, plus a summary with the busiest hour
+    of the day. ``by='spot'`` gives each spot's occupancy and turnover over
+    every bucket the camera was watched in; `spot_ids` ({camera: ids})
+    lists the spots to report, so spots that were never occupied show up
+    with zeros.
+    """
+    lot_rows = _rollup_rows(LotOccupancyRollup, granularity, start, end, camera)
+
+    if by == 'spot':
+        # Spot rows only exist for buckets a spot was occupied or changed in;
+        # the watched time comes from the camera's lot rows
+        buckets = {}
+        for row in lot_rows:
+            buckets.setdefault(row.camera, []).append((row.bucket_start, row.observed_seconds))
+        spot_rows = {}
+        for row in _rollup_rows(SpotOccupancyRollup, granularity, start, end, camera):
+            spot_rows[(row.camera, row.spot_id, row.bucket_start)] = row
+
+        spots = {}
+        for name in buckets:
+            spots[name] = set((spot_ids or {}).get(name, ()))
+        for name, spot, _ in spot_rows:
+            spots.setdefault(name, set()).add(spot)
+
+        series = []
+        for name in sorted(spots):
+            for spot in sorted(spots[name]):
+                if spot_id is not None and spot != spot_id:
+                    continue
+                occupied_total = observed_total = 0.0
+                turnover = 0
+                entry_buckets = []
+                for bucket, observed in buckets.get(name, ()):
+                    row = spot_rows.get((name, spot, bucket))
+                    occupied = row.occupied_seconds if row is not None else 0.0
+                    arrivals = row.arrivals if row is not None else 0
+                    occupied_total += occupied
+                    observed_total += observed
+                    turnover += arrivals
+                    entry_buckets.append({
+                        'start': bucket.isoformat(),
+                        'occupancy': _ratio(occupied, observed),
+                        'arrivals': arrivals,
+                        'departures': row.departures if row is not None else 0
+                    })
+                series.append({
+                    'camera': name,
+                    'spot_id': spot,
+                    'occupancy': _ratio(occupied_total, observed_total),
+                    'turnover': turnover,
+                    'buckets': entry_buckets
+                })
+        return series
+
+    hour_rows = lot_rows if granularity == 'hour' else _rollup_rows(LotOccupancyRollup, 'hour', start, end, camera)
+    series = {}
+    for row in lot_rows:
+        entry = series.setdefault(row.camera, {
+            'camera': row.camera, 'occupied_seconds': 0.0, 'capacity_seconds': 0.0,
+            'peak_occupied': 0, 'peak_at': None, 'arrivals': 0, 'departures': 0, 'buckets': []
+        })
+        capacity = row.observed_seconds * row.spots
+        entry['occupied_seconds'] += row.occupied_seconds
+        entry['capacity_seconds'] += capacity
+        entry['arrivals'] += row.arrivals
+        entry['departures'] += row.departures
+        if row.peak_occupied > entry['peak_occupied'] or entry['peak_at'] is None:
+            entry['peak_occupied'] = row.peak_occupied
+            entry['peak_at'] = row.bucket_start.isoformat()
+        entry['buckets'].append({
+            'start': row.bucket_start.isoformat(),
+            'occupancy': _ratio(row.occupied_seconds, capacity),
+            'peak_occupied': row.peak_occupied,
+            'arrivals': row.arrivals,
+            'departures': row.departures,
+            'observed_seconds': row.observed_seconds
+        })
+
+    # Hour of the day with the highest average occupancy over the whole range
+    by_hour = {}
+    for row in hour_rows:
+        totals = by_hour.setdefault((row.camera, row.bucket_start.hour), [0.0, 0.0])
+        totals[0] += row.occupied_seconds
+        totals[1] += row.observed_seconds * row.spots
+    for entry in series.values():
+        entry['occupancy'] = _ratio(entry.pop('occupied_seconds'), entry.pop('capacity_seconds'))
+        hours = {hour: _ratio(*totals) for (name, hour), totals in by_hour.items()
+                 if name == entry['camera'] and totals[1]}
+        entry['busiest_hour'] = max(hours, key=hours.get) if hours else None
+    return list(series.values())
+
+
+def _rollup_rows(model, granularity, start, end, camera):
+    # Plain rows rather than ORM objects: a year of hourly buckets is thousands of them
+    query = db.session.query(*model.__table__.columns).filter(
+        model.granularity == granularity,
+        model.bucket_start >= bucket_start(start, granularity),
+        model.bucket_start < end
+    )
+    if camera:
+        query = query.filter(model.camera == camera)
+    return query.order_by(model.camera, model.bucket_start).all()
+
+
+def _ratio(part, whole):
+    return part / whole if whole else None
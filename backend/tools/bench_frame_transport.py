@@ -0,0 +1,134 @@
+"""Compare moving frames between processes with multiprocessing.Queue versus
+the shared-memory SharedFrameRing.
+
+    python -m backend.tools.bench_frame_transport --frames 300 --width 1920 --height 1080
+"""
+import argparse
+import multiprocessing
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from backend.video.shm_ring import SharedFrameRing, RingReader
+
+
+def make_frames(shape, count=4):
+    rng = np.random.default_rng(0)
+    return [rng.integers(0, 255, shape, dtype=np.uint8) for _ in range(count)]
+
+
+def queue_producer(queue, shape, frames):
+    pool = make_frames(shape)
+    for index in range(frames):
+        queue.put((index, time.perf_counter(), pool[index % len(pool)]))
+    queue.put(None)
+
+
+def queue_consumer(queue, results):
+    latencies = []
+    received = 0
+    while True:
+        item = queue.get()
+        if item is None:
+            break
+        _, sent_at, frame = item
+        frame[::64, ::64].sum()  # touch the data like a real consumer would
+        latencies.append(time.perf_counter() - sent_at)
+        received += 1
+    results.put((received, latencies))
+
+
+def ring_producer(name, shape, frames, interval):
+    ring = SharedFrameRing.attach(name)
+    pool = make_frames(shape)
+    for index in range(frames):
+        ring.write(pool[index % len(pool)], time.perf_counter())
+        if interval:
+            time.sleep(interval)
+    ring.close()
+
+
+def ring_consumer(name, frames, results):
+    ring = SharedFrameRing.attach(name)
+    reader = RingReader(ring, start_at_latest=False)
+    latencies = []
+    received = 0
+    while reader.cursor < frames:
+        item = reader.next()
+        if item is None:
+            time.sleep(0.0005)
+            continue
+        seq, written_at, view = item
+        view[::64, ::64].sum()
+        if ring.is_valid(seq):
+            latencies.append(time.perf_counter() - written_at)
+            received += 1
+    results.put((received, latencies, reader.skipped))
+    del view, item
+    ring.close()
+
+
+def report(name, frames, elapsed, received, latencies, skipped=0):
+    latencies = np.array(latencies) * 1000 if latencies else np.zeros(1)
+    print(f"{name:>6}: {received}/{frames} frames in {elapsed:.2f}s "
+          f"({received / elapsed:.0f} fps), latency p50 {np.percentile(latencies, 50):.2f}ms "
+          f"p99 {np.percentile(latencies, 99):.2f}ms, skipped {skipped}")
+
+
+def bench_queue(context, shape, frames):
+    queue = context.Queue(maxsize=4)
+    results = context.Queue()
+    consumer = context.Process(target=queue_consumer, args=(queue, results))
+    producer = context.Process(target=queue_producer, args=(queue, shape, frames))
+    started = time.perf_counter()
+    consumer.start()
+    producer.start()
+    received, latencies = results.get()
+    elapsed = time.perf_counter() - started
+    producer.join()
+    consumer.join()
+    report('queue', frames, elapsed, received, latencies)
+
+
+def bench_ring(context, shape, frames, slots, interval):
+    ring = SharedFrameRing.create(shape, slots)
+    results = context.Queue()
+    consumer = context.Process(target=ring_consumer, args=(ring.name, frames, results))
+    producer = context.Process(target=ring_producer, args=(ring.name, shape, frames, interval))
+    started = time.perf_counter()
+    consumer.start()
+    producer.start()
+    received, latencies, skipped = results.get()
+    elapsed = time.perf_counter() - started
+    producer.join()
+    consumer.join()
+    ring.close()
+    report('ring', frames, elapsed, received, latencies, skipped)
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description='Frame transport micro-benchmark')
+    parser.add_argument("--frames", type=int, default=300, help="Frames to send")
+    parser.add_argument("--width", type=int, default=1920)
+    parser.add_argument("--height", type=int, default=1080)
+    parser.add_argument("--slots", type=int, default=8, help="Ring capacity")
+    parser.add_argument("--interval", type=float, default=0.0,
+                        help="Seconds between ring writes (0 = as fast as possible)")
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    shape = (args.height, args.width, 3)
+    context = multiprocessing.get_context('spawn')
+    print(f"Sending {args.frames} frames of {args.width}x{args.height}")
+    bench_queue(context, shape, args.frames)
+    bench_ring(context, shape, args.frames, args.slots, args.interval)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,347 @@
+"""Offline load test for the HTTP API.
+
+    python -m backend.tools.load_test --duration 30 --viewers 20 --pollers 50 --readers 10 --writers 5
+
+Starts the backend in a child process against a synthetic video file and a
+throwaway SQLite database, drives a mix of clients at it and reports, per
+endpoint, throughput, p50/p95/p99 latency and the server CPU spent:
+
+  viewers   long-poll /api/frame?since=<seq>&epoch=<epoch> for every new frame
+  pollers   GET /api/parking-status every --poll-interval seconds
+  readers   GET /api/vehicle-entries every --read-interval seconds
+  writers   POST /api/vehicle-entries every --write-interval seconds
+
+Per-endpoint CPU is measured with thread CPU time around each request, which
+is only meaningful with --server threaded (the default). With --server gevent
+(the production setup, see backend/serve.py) only the process total is
+reported.
+"""
+import argparse
+import asyncio
+import json
+import logging
+import os
+import random
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+TOOLS_DIR = os.path.dirname(os.path.abspath(__file__))
+REPO_DIR = os.path.dirname(os.path.dirname(TOOLS_DIR))
+
+
+# ---------------------------------------------------------------- server side
+
+def harness_blueprint():
+    """Per-endpoint CPU accounting, only registered on the load-test server"""
+    from flask import Blueprint, jsonify, g, request
+
+    harness = Blueprint('loadtest', __name__)
+    state = {'endpoints': {}, 'started': time.time(), 'cpu': sum(os.times()[:2])}
+
+    @harness.before_app_request
+    def start_timer():
+        g.loadtest_cpu = time.thread_time()
+
+    @harness.after_app_request
+    def record(response):
+        # Streamed bodies are produced after this point and are not counted
+        rule = request.url_rule.rule if request.url_rule else request.path
+        stats = state['endpoints'].setdefault(f"{request.method} {rule}", {'requests': 0, 'cpu_s': 0.0})
+        stats['requests'] += 1
+        stats['cpu_s'] += time.thread_time() - g.loadtest_cpu
+        return response
+
+    @harness.route('/__loadtest/reset')
+    def reset():
+        state.update(endpoints={}, started=time.time(), cpu=sum(os.times()[:2]))
+        return jsonify({'status': 'success'})
+
+    @harness.route('/__loadtest/stats')
+    def stats():
+        return jsonify({
+            'endpoints': state['endpoints'],
+            'elapsed_s': time.time() - state['started'],
+            'process_cpu_s': sum(os.times()[:2]) - state['cpu']
+        })
+
+    return harness
+
+
+def serve(args):
+    if args.server == 'gevent':
+        from gevent import monkey
+        monkey.patch_all()
+    sys.path.append(REPO_DIR)
+
+    from backend.config import Config
+    Config.SQLALCHEMY_DATABASE_URI = f"sqlite:///{args.db}"
+    Config.VIDEO_SOURCE = args.video
+    Config.START_FRAME = 0
+    Config.CAMERAS = [{'id': Config.DEFAULT_CAMERA, 'source': args.video,
+                       'coordinates': Config.COORDINATES_PATH}]
+    Config.DETECTION_MODE = 'process' if args.server == 'gevent' else 'thread'
+    Config.SOCKETIO_ASYNC_MODE = 'gevent' if args.server == 'gevent' else 'threading'
+
+    from backend.app import create_app
+    from backend.api import routes
+    from backend.api.socket_events import socketio
+
+    app = create_app()
+    app.register_blueprint(harness_blueprint())
+    with app.test_request_context():
+        routes.start_detection()
+
+    if args.server == 'gevent':
+        from gevent.threadpool import ThreadPoolExecutor
+        routes.jpeg_encoder.pool = ThreadPoolExecutor(2)
+        socketio.run(app, host='127.0.0.1', port=args.port, log_output=False)
+    else:
+        # Per-request access logging would dominate the numbers
+        logging.getLogger('werkzeug').setLevel(logging.WARNING)
+        app.run(host='127.0.0.1', port=args.port, threaded=True)
+
+
+def make_video(path, size, seconds=10, fps=30):
+    """Synthetic parking-lot clip: the sample frame with a block driving across it"""
+    import cv2
+
+    width, height = size
+    image = cv2.imread(os.path.join(TOOLS_DIR, 'parking_lot_frame.jpg'))
+    if image is None:
+        image = np.random.default_rng(0).integers(0, 255, (height, width, 3), dtype=np.uint8)
+    image = cv2.resize(image, (width, height))
+
+    writer = cv2.VideoWriter(path, cv2.VideoWriter_fourcc(*'MJPG'), fps, (width, height))
+    for index in range(seconds * fps):
+        frame = image.copy()
+        x = (index * 4) % width
+        cv2.rectangle(frame, (x, height * 3 // 4), (x + width // 20, height * 3 // 4 + height // 10),
+                      (40, 40, 200), -1)
+        writer.write(frame)
+    writer.release()
+
+
+def frame_size():
+    import yaml
+    sys.path.append(REPO_DIR)
+    from backend.config import Config
+    from backend.services.camera_service import resolve_path
+    with open(resolve_path(Config.COORDINATES_PATH)) as data:
+        dimensions = yaml.load(data, Loader=yaml.SafeLoader)['frame_dimensions']
+    return int(dimensions['width']), int(dimensions['height'])
+
+
+# ---------------------------------------------------------------- client side
+
+class Recorder:
+    def __init__(self):
+        self.latencies = {}
+        self.errors = {}
+
+    def add(self, name, seconds, ok):
+        self.latencies.setdefault(name, [])
+        self.errors.setdefault(name, 0)
+        if ok:
+            self.latencies[name].append(seconds)
+        else:
+            self.errors[name] += 1
+
+
+async def http(port, method, path, body=None, timeout=30):
+    """Minimal HTTP/1.1 request over a fresh connection; returns (status, body)"""
+    reader, writer = await asyncio.wait_for(asyncio.open_connection('127.0.0.1', port), timeout)
+    try:
+        payload = json.dumps(body).encode() if body is not None else b''
+        head = (f"{method} {path} HTTP/1.1\r\nHost: 127.0.0.1\r\nConnection: close\r\n"
+                f"Content-Type: application/json\r\nContent-Length: {len(payload)}\r\n\r\n")
+        writer.write(head.encode() + payload)
+        await writer.drain()
+        response = await asyncio.wait_for(reader.read(-1), timeout)
+    finally:
+        writer.close()
+    head, _, content = response.partition(b'\r\n\r\n')
+    if b'transfer-encoding: chunked' in head.lower():
+        content = dechunk(content)
+    return int(head.split(b' ', 2)[1]), content
+
+
+def dechunk(data):
+    out = []
+    while data:
+        size, _, data = data.partition(b'\r\n')
+        size = int(size, 16)
+        if not size:
+            break
+        out.append(data[:size])
+        data = data[size + 2:]
+    return b''.join(out)
+
+
+async def timed(recorder, name, port, method, path, body=None, ok_statuses=(200,)):
+    started = time.perf_counter()
+    try:
+        status, content = await http(port, method, path, body)
+    except (OSError, asyncio.TimeoutError, ValueError, IndexError):
+        recorder.add(name, 0, False)
+        return None, None
+    recorder.add(name, time.perf_counter() - started, status in ok_statuses)
+    return status, content
+
+
+async def viewer(recorder, port, deadline):
+    seq = 0
+    epoch = ''
+    while time.perf_counter() < deadline:
+        status, content = await timed(recorder, 'GET /api/frame (long-poll)', port, 'GET',
+                                      f"/api/frame?since={seq}&epoch={epoch}&timeout=5&w=320",
+                                      ok_statuses=(200, 304))
+        if status == 200:
+            frame = json.loads(content)
+            seq, epoch = frame.get('seq', seq), frame.get('epoch', epoch)
+        elif status is None:
+            await asyncio.sleep(0.5)
+
+
+async def periodic(recorder, name, port, method, path, interval, deadline, body=None, ok_statuses=(200,)):
+    # Stagger clients so they don't all fire on the same tick
+    await asyncio.sleep(random.uniform(0, interval))
+    while time.perf_counter() < deadline:
+        await timed(recorder, name, port, method, path, body() if body else None, ok_statuses)
+        await asyncio.sleep(interval)
+
+
+def entry_factory(writer_id):
+    counter = [0]
+
+    def make():
+        counter[0] += 1
+        return {
+            'ticketNumber': f"LT{writer_id:03d}{counter[0]:07d}",
+            'plateNumber': f"LT {random.randint(1000, 9999)}",
+            'vehicleType': 'motorcycle',
+            'parkingSlot': random.randint(1, 10),
+            'driverName': 'Load Test',
+            'contactNumber': '0000000000'
+        }
+    return make
+
+
+async def drive(args):
+    recorder = Recorder()
+    deadline = time.perf_counter() + args.duration
+    tasks = [viewer(recorder, args.port, deadline) for _ in range(args.viewers)]
+    tasks += [periodic(recorder, 'GET /api/parking-status', args.port, 'GET', '/api/parking-status',
+                       args.poll_interval, deadline) for _ in range(args.pollers)]
+    tasks += [periodic(recorder, 'GET /api/vehicle-entries', args.port, 'GET', '/api/vehicle-entries',
+                       args.read_interval, deadline) for _ in range(args.readers)]
+    tasks += [periodic(recorder, 'POST /api/vehicle-entries', args.port, 'POST', '/api/vehicle-entries',
+                       args.write_interval, deadline, entry_factory(index), (201,))
+              for index in range(args.writers)]
+    await asyncio.gather(*tasks)
+    return recorder
+
+
+async def wait_ready(port, timeout=60):
+    started = time.time()
+    while time.time() - started < timeout:
+        try:
+            status, _ = await http(port, 'GET', '/api/frame?frame=0', timeout=2)
+            if status == 200:
+                return True
+        except (OSError, asyncio.TimeoutError, ValueError, IndexError):
+            pass
+        await asyncio.sleep(0.5)
+    return False
+
+
+def report(args, recorder, server_stats):
+    endpoints = server_stats.get('endpoints', {}) if server_stats else {}
+    print(f"\n{'endpoint':<30}{'reqs':>8}{'errs':>6}{'req/s':>9}{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}{'cpu ms/req':>12}")
+    for name in sorted(recorder.latencies):
+        values = np.array(recorder.latencies[name]) * 1000
+        p50, p95, p99 = np.percentile(values, [50, 95, 99]) if len(values) else (0, 0, 0)
+        rule = name.split(' (')[0]
+        server = endpoints.get(rule)
+        cpu = (f"{server['cpu_s'] * 1000 / server['requests']:.2f}"
+               if server and server['requests'] and args.server == 'threaded' else '-')
+        print(f"{name:<30}{len(values):>8}{recorder.errors[name]:>6}{len(values) / args.duration:>9.1f}"
+              f"{p50:>9.1f}{p95:>9.1f}{p99:>9.1f}{cpu:>12}")
+
+    if server_stats:
+        elapsed = server_stats['elapsed_s']
+        total = server_stats['process_cpu_s']
+        in_requests = sum(s['cpu_s'] for s in endpoints.values())
+        print(f"\nServer process CPU: {total:.1f}s over {elapsed:.1f}s ({100 * total / elapsed:.0f}% of one core)")
+        if args.server == 'threaded':
+            print(f"  in request handlers: {in_requests:.1f}s, detection and everything else: {total - in_requests:.1f}s")
+
+
+def run(args):
+    workdir = tempfile.mkdtemp(prefix='parking-loadtest-')
+    video = os.path.join(workdir, 'synthetic.avi')
+    db = os.path.join(workdir, 'loadtest.db')
+    print(f"Generating synthetic video in {workdir}")
+    make_video(video, frame_size())
+
+    command = [sys.executable, '-m', 'backend.tools.load_test', '--serve', '--server', args.server,
+               '--port', str(args.port), '--video', video, '--db', db]
+    output = subprocess.DEVNULL if args.quiet else None
+    server = subprocess.Popen(command, cwd=REPO_DIR, stdout=output, stderr=output)
+    try:
+        if not asyncio.run(wait_ready(args.port)):
+            print("Server did not come up")
+            return 1
+
+        asyncio.run(http(args.port, 'GET', '/__loadtest/reset'))
+        print(f"Running {args.viewers} viewers, {args.pollers} pollers, {args.readers} readers, "
+              f"{args.writers} writers for {args.duration:.0f}s against the {args.server} server")
+        recorder = asyncio.run(drive(args))
+
+        _, content = asyncio.run(http(args.port, 'GET', '/__loadtest/stats'))
+        report(args, recorder, json.loads(content))
+    finally:
+        server.terminate()
+        try:
+            server.wait(10)
+        except subprocess.TimeoutExpired:
+            server.kill()
+        shutil.rmtree(workdir, ignore_errors=True)
+    return 0
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description='HTTP API load test')
+    parser.add_argument("--server", choices=['threaded', 'gevent'], default='threaded',
+                        help="threaded = python -m backend.app, gevent = backend.serve")
+    parser.add_argument("--port", type=int, default=5077)
+    parser.add_argument("--duration", type=float, default=30)
+    parser.add_argument("--viewers", type=int, default=10)
+    parser.add_argument("--pollers", type=int, default=20)
+    parser.add_argument("--readers", type=int, default=5)
+    parser.add_argument("--writers", type=int, default=2)
+    parser.add_argument("--poll-interval", type=float, default=0.5)
+    parser.add_argument("--read-interval", type=float, default=2.0)
+    parser.add_argument("--write-interval", type=float, default=1.0)
+    parser.add_argument("--quiet", action="store_true", help="Hide the server's output")
+    # Internal: run as the server child process
+    parser.add_argument("--serve", action="store_true", help=argparse.SUPPRESS)
+    parser.add_argument("--video", help=argparse.SUPPRESS)
+    parser.add_argument("--db", help=argparse.SUPPRESS)
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    if args.serve:
+        serve(args)
+        return 0
+    return run(args)
+
+
+if __name__ == '__main__':
+    sys.exit(main())
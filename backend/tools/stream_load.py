@@ -0,0 +1,164 @@
+"""Open many concurrent MJPEG viewers against a running server and report
+latency percentiles.
+
+    python -m backend.tools.stream_load --url http://localhost:5000 --clients 500 --duration 30
+
+Each viewer holds one /api/stream connection open and records when every
+frame arrives. A few probe clients meanwhile poll a cheap endpoint so we
+can see how request latency holds up while the streams are running.
+Only the standard library is used.
+"""
+import argparse
+import asyncio
+import time
+from urllib.parse import urlsplit
+
+import numpy as np
+
+
+class Results:
+    def __init__(self):
+        self.first_frame = []
+        self.gaps = []
+        self.frames = 0
+        self.bytes = 0
+        self.probe = []
+        self.errors = 0
+        self.connected = 0
+
+
+async def open_stream(host, port, path):
+    reader, writer = await asyncio.open_connection(host, port, limit=1 << 20)
+    writer.write(f"GET {path} HTTP/1.1\r\nHost: {host}\r\nConnection: keep-alive\r\n\r\n".encode())
+    await writer.drain()
+    head = await reader.readuntil(b'\r\n\r\n')
+    status = int(head.split(b' ', 2)[1])
+    if status != 200:
+        writer.close()
+        raise IOError(f"HTTP {status}")
+    return reader, writer, b'transfer-encoding: chunked' in head.lower()
+
+
+async def read_chunk(reader, chunked):
+    """Next piece of the body (de-chunked when needed)"""
+    if not chunked:
+        return await reader.read(65536)
+    size = int((await reader.readuntil(b'\r\n')).strip(), 16)
+    data = await reader.readexactly(size + 2)
+    return data[:-2]
+
+
+async def viewer(host, port, path, deadline, results):
+    started = time.perf_counter()
+    try:
+        reader, writer, chunked = await open_stream(host, port, path)
+    except (OSError, asyncio.IncompleteReadError) as e:
+        results.errors += 1
+        return
+    results.connected += 1
+
+    buffer = b''
+    last = None
+    try:
+        while time.perf_counter() < deadline:
+            data = await read_chunk(reader, chunked)
+            if not data:
+                break
+            buffer += data
+            results.bytes += len(data)
+            # One part = boundary line, headers, JPEG; only the arrival matters
+            while True:
+                head_end = buffer.find(b'\r\n\r\n')
+                if head_end < 0:
+                    break
+                headers = buffer[:head_end].lower()
+                marker = headers.find(b'content-length:')
+                if marker < 0:
+                    break
+                length = int(headers[marker + 15:].split(b'\r\n', 1)[0])
+                end = head_end + 4 + length + 2
+                if len(buffer) < end:
+                    break
+                buffer = buffer[end:]
+
+                now = time.perf_counter()
+                if last is None:
+                    results.first_frame.append(now - started)
+                else:
+                    results.gaps.append(now - last)
+                last = now
+                results.frames += 1
+    except (OSError, asyncio.IncompleteReadError, ValueError):
+        results.errors += 1
+    finally:
+        writer.close()
+
+
+async def probe(host, port, path, interval, deadline, results):
+    while time.perf_counter() < deadline:
+        started = time.perf_counter()
+        try:
+            reader, writer = await asyncio.open_connection(host, port)
+            writer.write(f"GET {path} HTTP/1.1\r\nHost: {host}\r\nConnection: close\r\n\r\n".encode())
+            await writer.drain()
+            await reader.read()
+            writer.close()
+            results.probe.append(time.perf_counter() - started)
+        except OSError:
+            results.errors += 1
+        await asyncio.sleep(interval)
+
+
+def percentiles(values, scale=1000):
+    if not values:
+        return "n/a"
+    p50, p95, p99 = np.percentile(np.array(values) * scale, [50, 95, 99])
+    return f"p50 {p50:.1f}ms  p95 {p95:.1f}ms  p99 {p99:.1f}ms"
+
+
+async def run(args):
+    url = urlsplit(args.url)
+    host, port = url.hostname, url.port or 80
+    deadline = time.perf_counter() + args.ramp + args.duration
+    results = Results()
+
+    tasks = [asyncio.ensure_future(probe(host, port, args.probe_path, args.probe_interval, deadline, results))
+             for _ in range(args.probes)]
+    for index in range(args.clients):
+        tasks.append(asyncio.ensure_future(viewer(host, port, args.path, deadline, results)))
+        # Spread connects over the ramp so we measure steady state, not a SYN flood
+        await asyncio.sleep(args.ramp / max(args.clients, 1))
+    await asyncio.gather(*tasks)
+    return results
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description='MJPEG stream load generator')
+    parser.add_argument("--url", default="http://localhost:5000")
+    parser.add_argument("--path", default="/api/stream?w=320&q=40", help="Stream to open")
+    parser.add_argument("--clients", type=int, default=500)
+    parser.add_argument("--duration", type=float, default=30, help="Seconds after ramp-up")
+    parser.add_argument("--ramp", type=float, default=5, help="Seconds to open all clients")
+    parser.add_argument("--probes", type=int, default=4)
+    parser.add_argument("--probe-path", default="/api/parking-status.bin")
+    parser.add_argument("--probe-interval", type=float, default=0.2)
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    started = time.perf_counter()
+    results = asyncio.run(run(args))
+    elapsed = time.perf_counter() - started
+
+    print(f"Viewers: {results.connected}/{args.clients} connected, {results.errors} errors")
+    print(f"Frames: {results.frames} ({results.frames / elapsed:.0f}/s total, "
+          f"{results.frames / elapsed / max(results.connected, 1):.1f}/s per viewer), "
+          f"{results.bytes / elapsed / 1e6:.1f} MB/s")
+    print(f"First frame:   {percentiles(results.first_frame)}")
+    print(f"Frame gap:     {percentiles(results.gaps)}")
+    print(f"Probe {args.probe_path}: {percentiles(results.probe)} ({len(results.probe)} requests)")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,120 @@
+import threading
+from concurrent.futures import Future
+
+MJPEG_BOUNDARY = 'frame'
+
+
+class FrameBroadcaster:
+    """Latest rendered frame (and the status that goes with it) shared by any
+    number of viewers.
+
+    The producer replaces the single frame on every ``publish`` and bumps
+    ``seq``; viewers block in ``wait`` until something newer than what they
+    last got shows up. Nothing is queued per viewer, so a slow client simply
+    skips the frames it was too slow for.
+
+    Nothing is encoded on publish. JPEGs (and anything else derived from a
+    frame) are built on first request through ``cached``, once per frame and
+    key, so an idle server does no encoding at all.
+    """
+
+    def __init__(self, encoder):
+        self.encoder = encoder
+        self._cond = threading.Condition()
+        self.seq = 0
+        self.frame = None
+        self.status = None
+        self._cache = {}
+
+    def publish(self, frame, status=None):
+        """Replace the current frame; `status` None keeps the previous status"""
+        with self._cond:
+            self.seq += 1
+            self.frame = frame
+            if status is not None:
+                self.status = status
+            self._cache = {}
+            self._cond.notify_all()
+        return self.seq
+
+    def latest(self):
+        """Return ``(seq, frame)`` of the newest frame (frame is None before the first)"""
+        with self._cond:
+            return self.seq, self.frame
+
+    def snapshot(self):
+        """Return ``(seq, frame, status)`` of the newest frame"""
+        with self._cond:
+            return self.seq, self.frame, self.status
+
+    def wait(self, after_seq, timeout=1.0):
+        """Block until a frame newer than `after_seq` exists; ``(seq, frame)`` or None on timeout"""
+        with self._cond:
+            if not self._cond.wait_for(lambda: self.seq > after_seq and self.frame is not None, timeout):
+                return None
+            return self.seq, self.frame
+
+    def cached(self, seq, key, build):
+        """Value of `build()` for frame `seq`, computed once per frame and `key`.
+
+        Concurrent callers asking for the same value wait for the first one
+        to build it instead of building it again.
+        """
+        with self._cond:
+            if seq != self.seq:
+                # Superseded already; not worth caching
+                future = None
+            else:
+                future = self._cache.get(key)
+                owner = future is None
+                if owner:
+                    future = self._cache[key] = Future()
+        if future is None:
+            return build()
+
+        if owner:
+            try:
+                future.set_result(build())
+            except Exception as e:
+                future.set_exception(e)
+                with self._cond:
+                    if self._cache.get(key) is future:
+                        del self._cache[key]
+        return future.result()
+
+    def jpeg(self, seq, frame, width=None, quality=None):
+        """JPEG of frame `seq` at the encoder tier nearest to (width, quality)"""
+        width, quality = self.encoder.tier(width, quality)
+        return self.cached(seq, ('jpeg', width, quality),
+                           lambda: self.encoder.encode(frame, width, quality))
+
+    def wait_jpeg(self, after_seq, timeout=1.0, width=None, quality=None):
+        """Like ``wait`` but returns ``(seq, jpeg)``"""
+        item = self.wait(after_seq, timeout)
+        if item is None:
+            return None
+        seq, frame = item
+        return seq, self.jpeg(seq, frame, width, quality)
+
+
+def mjpeg_stream(next_frame, should_run=lambda: True, on_close=None):
+    """Generate a multipart/x-mixed-replace body.
+
+    `next_frame(last_seq)` returns the next ``(seq, jpeg)`` newer than
+    `last_seq`, or None if nothing arrived in time (the stream then just
+    keeps waiting while `should_run()` is true).
+    """
+    last_seq = 0
+    try:
+        while should_run():
+            item = next_frame(last_seq)
+            if item is None:
+                continue
+            last_seq, jpeg = item
+            yield (b'--' + MJPEG_BOUNDARY.encode() + b'\r\n'
+                   b'Content-Type: image/jpeg\r\n'
+                   b'Content-Length: ' + str(len(jpeg)).encode() + b'\r\n\r\n' +
+                   jpeg + b'\r\n')
+    finally:
+        if on_close is not None:
+            on_close()
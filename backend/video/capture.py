@@ -0,0 +1,149 @@
+import threading
+import time
+
+import cv2
+
+
+class FrameGrabber:
+    """Read a video source on its own thread, keeping only the newest frame.
+
+    Consumers call ``read`` to get the latest frame they have not seen yet.
+    A frame that is replaced before anyone read it is counted as dropped, so
+    slow consumers always work on fresh frames instead of a growing backlog.
+    RTSP sources are reconnected on failure; files loop back to
+    ``start_frame`` and are paced at their native frame rate.
+    """
+
+    def __init__(self, source, size=None, start_frame=0, reconnect_delay=1.0, max_reconnects=None):
+        self.source = source
+        self.size = size
+        self.start_frame = start_frame
+        self.reconnect_delay = reconnect_delay
+        self.max_reconnects = max_reconnects
+        self.is_stream = isinstance(source, str) and source.startswith('rtsp://')
+
+        self._cond = threading.Condition()
+        self._frame = None
+        self._seq = 0
+        self._captured_at = None
+        self._consumed_seq = 0
+        self._running = False
+        self._thread = None
+
+        self.frames_captured = 0
+        self.frames_dropped = 0
+        self.read_failures = 0
+        self.error = None
+
+    def _open(self):
+        cap = cv2.VideoCapture(self.source)
+        if not cap.isOpened():
+            return None
+
+        if self.is_stream:
+            cap.set(cv2.CAP_PROP_BUFFERSIZE, 1)
+            cap.set(cv2.CAP_PROP_FOURCC, cv2.VideoWriter_fourcc('H', '2', '6', '4'))
+            if self.size:
+                cap.set(cv2.CAP_PROP_FRAME_WIDTH, self.size[0])
+                cap.set(cv2.CAP_PROP_FRAME_HEIGHT, self.size[1])
+        else:
+            cap.set(cv2.CAP_PROP_POS_FRAMES, self.start_frame)
+            cap.set(cv2.CAP_PROP_BUFFERSIZE, 3)
+        return cap
+
+    def start(self):
+        cap = self._open()
+        if cap is None:
+            raise IOError(f"Could not open video source: {self.source}")
+
+        self._running = True
+        self._thread = threading.Thread(target=self._run, args=(cap,), daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._running = False
+        with self._cond:
+            self._cond.notify_all()
+        if self._thread:
+            self._thread.join()
+
+    def is_alive(self):
+        return self._thread is not None and self._thread.is_alive()
+
+    def _run(self, cap):
+        fps = cap.get(cv2.CAP_PROP_FPS)
+        # Files would otherwise be decoded as fast as the CPU allows
+        frame_interval = 1.0 / fps if not self.is_stream and fps and fps > 0 else 0
+        next_frame_at = time.time()
+        reconnects = 0
+
+        try:
+            while self._running:
+                success, frame = cap.read()
+                if not success:
+                    self.read_failures += 1
+                    if self.is_stream:
+                        print("Failed to read frame, reconnecting...")
+                        cap.release()
+                        time.sleep(self.reconnect_delay)
+                        reconnects += 1
+                        new_cap = self._open()
+                        if new_cap is None:
+                            if self.max_reconnects is not None and reconnects >= self.max_reconnects:
+                                self.error = "Failed to reconnect to RTSP stream"
+                                print(self.error)
+                                break
+                            # An unopened capture fails the next read and retries
+                            new_cap = cv2.VideoCapture()
+                        cap = new_cap
+                    else:
+                        cap.set(cv2.CAP_PROP_POS_FRAMES, self.start_frame)
+                    continue
+
+                reconnects = 0
+                self._publish(frame, time.time())
+
+                if frame_interval:
+                    next_frame_at += frame_interval
+                    delay = next_frame_at - time.time()
+                    if delay > 0:
+                        time.sleep(delay)
+                    else:
+                        next_frame_at = time.time()
+        finally:
+            cap.release()
+            self._running = False
+            with self._cond:
+                self._cond.notify_all()
+
+    def _publish(self, frame, captured_at):
+        with self._cond:
+            if self._seq and self._consumed_seq < self._seq:
+                self.frames_dropped += 1
+            self._frame = frame
+            self._seq += 1
+            self._captured_at = captured_at
+            self.frames_captured += 1
+            self._cond.notify_all()
+
+    def read(self, last_seq=0, timeout=1.0):
+        """Wait for a frame newer than `last_seq`.
+
+        Returns ``(seq, captured_at, frame)`` or None if nothing newer arrived
+        within `timeout` seconds or the grabber stopped.
+        """
+        with self._cond:
+            if not self._cond.wait_for(lambda: self._seq > last_seq or not self._running, timeout):
+                return None
+            if self._seq <= last_seq:
+                return None
+            self._consumed_seq = self._seq
+            return self._seq, self._captured_at, self._frame
+
+    def stats(self):
+        return {
+            'frames_captured': self.frames_captured,
+            'frames_dropped': self.frames_dropped,
+            'read_failures': self.read_failures
+        }
@@ -0,0 +1,55 @@
+from concurrent.futures import ThreadPoolExecutor
+
+import cv2
+
+
+class JpegEncoder:
+    """JPEG encoding at a fixed set of size/quality tiers.
+
+    Requested widths and qualities are snapped to the configured tiers so
+    there are only a handful of variants of any frame to encode and cache.
+    With ``workers`` > 0 encodes run on a small thread pool instead of the
+    calling thread (useful when requests are served by green threads).
+    """
+
+    def __init__(self, quality=85, widths=(320, 640, 1280), qualities=(40, 60, 85),
+                 optimize=True, workers=0):
+        self.quality = quality
+        self.widths = sorted(widths)
+        self.qualities = sorted(set(qualities) | {quality})
+        self.optimize = optimize
+        self.pool = ThreadPoolExecutor(workers, thread_name_prefix='jpeg') if workers else None
+        self.encoded = 0
+
+    def tier(self, width=None, quality=None):
+        """Snap a requested (width, quality) to a tier; width None means full size"""
+        if width is not None:
+            width = next((w for w in self.widths if w >= width), None)
+        if quality is None:
+            quality = self.quality
+        else:
+            quality = min(self.qualities, key=lambda q: abs(q - quality))
+        return width, quality
+
+    def encode(self, frame, width=None, quality=None):
+        """JPEG bytes of `frame` at the given tier (call ``tier`` first)"""
+        if self.pool is not None:
+            return self.pool.submit(self._encode, frame, width, quality).result()
+        return self._encode(frame, width, quality)
+
+    def _encode(self, frame, width, quality):
+        if quality is None:
+            quality = self.quality
+        height, frame_width = frame.shape[:2]
+        if width is not None and width < frame_width:
+            size = (width, max(1, round(height * width / frame_width)))
+            frame = cv2.resize(frame, size, interpolation=cv2.INTER_AREA)
+        params = [int(cv2.IMWRITE_JPEG_QUALITY), quality,
+                  int(cv2.IMWRITE_JPEG_OPTIMIZE), int(self.optimize)]
+        _, buffer = cv2.imencode('.jpg', frame, params)
+        self.encoded += 1
+        return buffer.tobytes()
+
+    def close(self):
+        if self.pool is not None:
+            self.pool.shutdown(wait=False)
@@ -0,0 +1,143 @@
+import collections
+import threading
+import time
+
+
+class StageQueue:
+    """Bounded hand-off queue between pipeline stages.
+
+    When full, ``put`` discards the oldest queued item instead of blocking,
+    so a slow stage sheds stale frames rather than stalling the stages in
+    front of it.
+    """
+
+    def __init__(self, capacity):
+        self.capacity = capacity
+        self._items = collections.deque()
+        self._cond = threading.Condition()
+        self.dropped = 0
+
+    def put(self, item):
+        with self._cond:
+            if len(self._items) >= self.capacity:
+                self._items.popleft()
+                self.dropped += 1
+            self._items.append(item)
+            self._cond.notify()
+
+    def get(self, timeout=None):
+        with self._cond:
+            if not self._cond.wait_for(lambda: self._items, timeout):
+                return None
+            return self._items.popleft()
+
+    def wake_all(self):
+        with self._cond:
+            self._cond.notify_all()
+
+    def __len__(self):
+        return len(self._items)
+
+
+class Stage:
+    """A pool of worker threads applying `func` to items from `inbox`.
+
+    `func` returns the item to pass downstream, or None to drop it. With more
+    than one worker, items may leave the stage out of order; consumers that
+    care should compare sequence numbers.
+    """
+
+    def __init__(self, name, func, workers=1, queue_size=2):
+        self.name = name
+        self.func = func
+        self.workers = workers
+        self.inbox = StageQueue(queue_size)
+        self.outbox = None
+
+        self._threads = []
+        self._running = False
+        self._lock = threading.Lock()
+
+        self.processed = 0
+        self.errors = 0
+        self.service_time_avg = 0.0
+        self.service_time_max = 0.0
+
+    def start(self):
+        self._running = True
+        for index in range(self.workers):
+            thread = threading.Thread(target=self._run, name=f"{self.name}-{index}", daemon=True)
+            thread.start()
+            self._threads.append(thread)
+
+    def stop(self):
+        self._running = False
+        self.inbox.wake_all()
+        for thread in self._threads:
+            thread.join()
+        self._threads = []
+
+    def _run(self):
+        while self._running:
+            item = self.inbox.get(timeout=0.5)
+            if item is None:
+                continue
+
+            started = time.perf_counter()
+            try:
+                result = self.func(item)
+            except Exception as e:
+                print(f"Error in {self.name} stage: {e}")
+                with self._lock:
+                    self.errors += 1
+                continue
+            elapsed = time.perf_counter() - started
+
+            with self._lock:
+                self.processed += 1
+                self.service_time_avg += (elapsed - self.service_time_avg) * 0.05
+                self.service_time_max = max(self.service_time_max, elapsed)
+
+            if result is not None and self.outbox is not None:
+                self.outbox.put(result)
+
+    def stats(self):
+        return {
+            'workers': self.workers,
+            'queue_depth': len(self.inbox),
+            'queue_capacity': self.inbox.capacity,
+            'dropped': self.inbox.dropped,
+            'processed': self.processed,
+            'errors': self.errors,
+            'service_ms': self.service_time_avg * 1000,
+            'service_max_ms': self.service_time_max * 1000
+        }
+
+
+class Pipeline:
+    """Linear chain of stages connected by drop-oldest bounded queues"""
+
+    def __init__(self):
+        self.stages = []
+
+    def add_stage(self, name, func, workers=1, queue_size=2):
+        stage = Stage(name, func, workers, queue_size)
+        if self.stages:
+            self.stages[-1].outbox = stage.inbox
+        self.stages.append(stage)
+        return stage
+
+    def feed(self, item):
+        self.stages[0].inbox.put(item)
+
+    def start(self):
+        for stage in self.stages:
+            stage.start()
+        return self
+
+    def stop(self):
+        for stage in self.stages:
+            stage.stop()
+
+    def stats(self):
+        return {stage.name: stage.stats() for stage in self.stages}
@@ -0,0 +1,144 @@
+import time
+
+import cv2
+
+from backend.detection.colors import COLOR_GREEN, COLOR_BLUE
+from backend.detection.overlay import OverlayRenderer
+from .capture import FrameGrabber
+from .pipeline import Pipeline
+
+
+class DetectionRunner:
+    """Capture, detection and overlay pipeline for one camera.
+
+    Frames flow capture -> preprocess -> detect -> render and each finished
+    frame is handed to ``on_publish`` as a packet dict with ``seq``,
+    ``captured_at``, ``frame`` (the rendered image) and ``statuses``; packets
+    from a detection tick also carry the detector's ``status`` (a
+    StatusSnapshot). Frames are not encoded here: JPEGs are made on demand
+    by whoever serves them.
+    """
+
+    def __init__(self, detector, source, on_publish, start_frame=0, workers=None,
+                 queue_size=2, detection_interval=3):
+        self.detector = detector
+        self.source = source
+        self.on_publish = on_publish
+        self.start_frame = start_frame
+        self.workers = workers or {}
+        self.queue_size = queue_size
+        self.detection_interval = detection_interval
+
+        dimensions = detector.original_dimensions
+        self.target_width = dimensions['width']
+        self.target_height = dimensions['height']
+
+        layout = detector.layout
+        self.overlay = OverlayRenderer(layout, available_color=COLOR_GREEN, occupied_color=COLOR_BLUE,
+                                       label_anchors=layout.centroids)
+
+        self.grabber = None
+        self.pipeline = None
+        self._detect_count = 0
+        self._published_seq = 0
+        self._published = 0
+        self._last_report = time.time()
+        self.capture_stats = {'latency_ms': 0.0, 'latency_avg_ms': 0.0}
+
+    def start(self):
+        """Open the source and start all stages; raises IOError if it can't be opened"""
+        print(f"Starting video capture from: {self.source}")
+        self.grabber = FrameGrabber(
+            self.source,
+            size=(self.target_width, self.target_height),
+            start_frame=self.start_frame
+        )
+        self.grabber.start()
+
+        pipeline = Pipeline()
+        pipeline.add_stage('preprocess', self._preprocess, self.workers.get('preprocess', 1), self.queue_size)
+        # Single worker, so the detector only ever sees frames in capture order
+        pipeline.add_stage('detect', self._detect, 1, self.queue_size)
+        pipeline.add_stage('render', self._render, self.workers.get('render', 1), self.queue_size)
+        pipeline.add_stage('publish', self._publish, 1, self.queue_size)
+        self.pipeline = pipeline.start()
+        return self
+
+    def run(self, should_run):
+        """Feed captured frames into the pipeline until `should_run()` is false"""
+        last_seq = 0
+        while should_run():
+            # Hand every new capture to the pipeline; full queues drop the oldest
+            item = self.grabber.read(last_seq, timeout=1.0)
+            if item is None:
+                if not self.grabber.is_alive():
+                    print("Video capture stopped")
+                    break
+                continue
+            last_seq, captured_at, frame = item
+            self.pipeline.feed({'seq': last_seq, 'captured_at': captured_at, 'frame': frame})
+
+    def stop(self):
+        if self.pipeline is not None:
+            self.pipeline.stop()
+        if self.grabber is not None:
+            self.grabber.stop()
+
+    def stats(self):
+        return {
+            'capture': self.capture_stats,
+            'pipeline': self.pipeline.stats() if self.pipeline else {}
+        }
+
+    def _preprocess(self, packet):
+        # Resize frame to match original dimensions from parking space picker
+        frame = packet['frame']
+        current_height, current_width = frame.shape[:2]
+        if current_width != self.target_width or current_height != self.target_height:
+            packet['frame'] = cv2.resize(
+                frame,
+                (self.target_width, self.target_height),
+                interpolation=cv2.INTER_AREA
+            )
+        return packet
+
+    def _detect(self, packet):
+        # Process detection at specified intervals
+        if self._detect_count % self.detection_interval == 0:
+            self.detector.process_frame(packet['frame'], packet['captured_at'], draw=False)
+            packet['status'] = self.detector.snapshot
+        self._detect_count += 1
+        # Read-only array owned by the snapshot, safe to share with later stages
+        packet['statuses'] = self.detector.snapshot.statuses
+        return packet
+
+    def _render(self, packet):
+        # Green if available, Blue if occupied. Each packet owns its frame
+        # (capture allocates a new one per read), so it is drawn on in place
+        self.overlay.draw(packet['frame'], packet['statuses'])
+        return packet
+
+    def _publish(self, packet):
+        # Render workers may finish out of order; never go back to an older frame
+        if packet['seq'] <= self._published_seq:
+            return None
+        self._published_seq = packet['seq']
+
+        self.on_publish(packet)
+
+        # Capture-to-publish latency of the frame we just published
+        current_time = time.time()
+        latency_ms = (current_time - packet['captured_at']) * 1000
+        stats = self.capture_stats
+        stats['latency_ms'] = latency_ms
+        stats['latency_avg_ms'] += (latency_ms - stats['latency_avg_ms']) * 0.05
+        stats.update(self.grabber.stats())
+
+        self._published += 1
+        if self._published % 100 == 0:
+            elapsed = current_time - self._last_report
+            print(f"Processed {self._published} frames, FPS: {100.0/elapsed:.2f}, "
+                  f"latency: {stats['latency_avg_ms']:.0f}ms, "
+                  f"dropped: {self.grabber.frames_dropped}")
+            self._last_report = current_time
+        return None
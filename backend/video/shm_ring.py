@@ -0,0 +1,157 @@
+from multiprocessing import shared_memory
+
+import numpy as np
+
+_MAGIC = 0x52494E47  # "RING"
+_HEADER_FIELDS = 8   # magic, capacity, height, width, channels, write_seq, reserved...
+_ALIGN = 64
+
+
+def _aligned(offset):
+    return (offset + _ALIGN - 1) // _ALIGN * _ALIGN
+
+
+class SharedFrameRing:
+    """Fixed-capacity ring of preallocated frame slots in shared memory.
+
+    A single writer copies each frame into the next slot and stamps it with a
+    monotonically increasing sequence number; any number of readers in any
+    process can attach by name and get numpy views of slots without copying.
+
+    Slots are guarded seqlock-style: while a slot is being written its
+    sequence number is negative. A reader that used a view should call
+    ``is_valid(seq)`` afterwards; False means the writer lapped it and the
+    data may be torn.
+    """
+
+    def __init__(self, shm, owner):
+        self.shm = shm
+        self.owner = owner
+        self.name = shm.name
+
+        buf = shm.buf
+        self._header = np.ndarray((_HEADER_FIELDS,), dtype=np.int64, buffer=buf)
+        if self._header[0] != _MAGIC:
+            raise ValueError(f"{shm.name} is not a frame ring")
+        self.capacity, height, width, channels = (int(v) for v in self._header[1:5])
+        self.shape = (height, width, channels)
+
+        offset = _HEADER_FIELDS * 8
+        self._slot_seq = np.ndarray((self.capacity,), dtype=np.int64, buffer=buf, offset=offset)
+        offset += self.capacity * 8
+        self._slot_time = np.ndarray((self.capacity,), dtype=np.float64, buffer=buf, offset=offset)
+        offset = _aligned(offset + self.capacity * 8)
+        self._frames = np.ndarray((self.capacity,) + self.shape, dtype=np.uint8, buffer=buf, offset=offset)
+
+    @classmethod
+    def _size(cls, capacity, shape):
+        offset = _aligned(_HEADER_FIELDS * 8 + capacity * 16)
+        return offset + capacity * int(np.prod(shape))
+
+    @classmethod
+    def create(cls, shape, capacity=4, name=None):
+        """Allocate a new ring for uint8 frames of `shape` (height, width[, channels])"""
+        if len(shape) == 2:
+            shape = tuple(shape) + (1,)
+        shm = shared_memory.SharedMemory(name=name, create=True, size=cls._size(capacity, shape))
+        header = np.ndarray((_HEADER_FIELDS,), dtype=np.int64, buffer=shm.buf)
+        header[:] = 0
+        header[1:5] = (capacity,) + tuple(shape)
+        header[0] = _MAGIC
+        del header
+        ring = cls(shm, owner=True)
+        ring._slot_seq[:] = 0
+        return ring
+
+    @classmethod
+    def attach(cls, name):
+        """Open an existing ring created by another process"""
+        return cls(shared_memory.SharedMemory(name=name), owner=False)
+
+    @property
+    def write_seq(self):
+        """Sequence number of the newest complete frame (0 if none yet)"""
+        return int(self._header[5])
+
+    def write(self, frame, timestamp):
+        """Copy `frame` into the next slot; returns its sequence number"""
+        seq = self.write_seq + 1
+        slot = (seq - 1) % self.capacity
+        self._slot_seq[slot] = -seq
+        self._frames[slot].reshape(frame.shape)[...] = frame
+        self._slot_time[slot] = timestamp
+        self._slot_seq[slot] = seq
+        self._header[5] = seq
+        return seq
+
+    def get(self, seq):
+        """Return ``(timestamp, view)`` for `seq`, or None if it was overwritten"""
+        if seq <= 0:
+            return None
+        slot = (seq - 1) % self.capacity
+        if self._slot_seq[slot] != seq:
+            return None
+        return self._slot_time[slot], self._view(slot)
+
+    def latest(self):
+        """Return ``(seq, timestamp, view)`` of the newest frame, or None"""
+        seq = self.write_seq
+        item = self.get(seq)
+        if item is None:
+            return None
+        return (seq,) + item
+
+    def is_valid(self, seq):
+        return seq > 0 and self._slot_seq[(seq - 1) % self.capacity] == seq
+
+    def copy(self, seq):
+        """Consistent private copy of frame `seq`, or None if it was overwritten"""
+        item = self.get(seq)
+        if item is None:
+            return None
+        frame = item[1].copy()
+        return frame if self.is_valid(seq) else None
+
+    def _view(self, slot):
+        frame = self._frames[slot]
+        return frame[..., 0] if self.shape[2] == 1 else frame
+
+    def close(self):
+        # Drop our views first; SharedMemory refuses to close with exports alive
+        self._header = self._slot_seq = self._slot_time = self._frames = None
+        self.shm.close()
+        if self.owner:
+            self.shm.unlink()
+
+
+class RingReader:
+    """Per-consumer cursor over a SharedFrameRing.
+
+    ``next`` returns the oldest frame the consumer hasn't seen that is still
+    in the ring; frames that were overwritten before being read are counted
+    in ``skipped``.
+    """
+
+    def __init__(self, ring, start_at_latest=True):
+        self.ring = ring
+        self.cursor = ring.write_seq if start_at_latest else 0
+        self.skipped = 0
+
+    def next(self):
+        """Return ``(seq, timestamp, view)`` or None if nothing new is available"""
+        ring = self.ring
+        head = ring.write_seq
+        if head <= self.cursor:
+            return None
+
+        seq = max(self.cursor + 1, head - ring.capacity + 1)
+        self.skipped += seq - self.cursor - 1
+        item = ring.get(seq)
+        if item is None:
+            # Lapped between reading the head and the slot; jump to the newest
+            seq = ring.write_seq
+            item = ring.get(seq)
+            if item is None:
+                return None
+        self.cursor = seq
+        return (seq,) + item
@@ -2,7 +2,7 @@ import React, { useEffect, useState, useRef } from 'react';
 import './ParkingLot.css';
 
 const SOCKET_URL = 'http://localhost:5000';
-const POLLING_INTERVAL = 33; // ~30 FPS
+const POLLING_INTERVAL = 500; // status only; video comes from the MJPEG stream
 
 const ParkingLot = ({ onStatusUpdate }) => {
   const [spaces, setSpaces] = useState({});
@@ -13,6 +13,7 @@ const ParkingLot = ({ onStatusUpdate }) => {
   const canvasRef = useRef(null);
   const containerRef = useRef(null);
   const pollingRef = useRef(null);
+  const layoutRef = useRef({});
   const fpsRef = useRef(0);
 
   const drawParkingSpaces = (data) => {
@@ -93,18 +94,24 @@ const ParkingLot = ({ onStatusUpdate }) => {
   const startPolling = async () => {
     try {
       await fetch(`${SOCKET_URL}/api/start-detection`);
+      // Coordinates and dimensions never change, so they are fetched once
+      const layoutResponse = await fetch(`${SOCKET_URL}/api/layout`);
+      layoutRef.current = await layoutResponse.json();
       setLoading(false);
 
       const pollFrame = async () => {
         try {
-          const response = await fetch(`${SOCKET_URL}/api/frame`);
+          const response = await fetch(`${SOCKET_URL}/api/frame?frame=0`);
           if (!response.ok) throw new Error('Frame fetch failed');
 
           const data = await response.json();
 
-          if (data.frame) {
-            videoRef.current.src = `data:image/jpeg;base64,${data.frame}`;
-            drawParkingSpaces(data);
+          if (videoRef.current) {
+            // The browser keeps the multipart stream open and swaps frames in place
+            if (!videoRef.current.src) {
+              videoRef.current.src = `${SOCKET_URL}/api/stream`;
+            }
+            drawParkingSpaces({ ...layoutRef.current, ...data });
           }
 
           setStats({
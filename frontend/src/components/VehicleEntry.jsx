@@ -20,6 +20,9 @@ import { useReactToPrint } from 'react-to-print';
 import { createPortal } from 'react-dom';
 import { API_URL } from '../config';
 
+// Entries shown per table page
+const PAGE_SIZE = 50;
+
 const VehicleEntry = ({ parkingStats }) => {
   // console.log('Parking Stats:', parkingStats); // For debugging
 
@@ -33,6 +36,10 @@ const VehicleEntry = ({ parkingStats }) => {
   });
 
   const [entries, setEntries] = useState([]);
+  // Cursor of every page visited so far (null for the first); the last one is shown
+  const [pageCursors, setPageCursors] = useState([null]);
+  const [nextCursor, setNextCursor] = useState(null);
+  const [occupiedSlots, setOccupiedSlots] = useState(new Set());
   const [showTicket, setShowTicket] = useState(false);
   const [ticketData, setTicketData] = useState(null);
   const [availableSlots, setAvailableSlots] = useState([]);
@@ -83,9 +90,6 @@ const VehicleEntry = ({ parkingStats }) => {
   // Update availableSlots based on parkingStatus
   useEffect(() => {
     if (parkingStatus.total > 0) {
-      // Get all occupied slots from current entries
-      const occupiedSlots = new Set(entries.map(entry => entry.parkingSlot));
-
       // Generate array of all slots (1 to total)
       const allSlots = Array.from(
         { length: parkingStatus.total },
@@ -99,18 +103,25 @@ const VehicleEntry = ({ parkingStats }) => {
 
       setAvailableSlots(availableSlotNumbers);
     }
-  }, [parkingStatus.total, entries]);
+  }, [parkingStatus.total, occupiedSlots]);
 
-  // Fetch entries on component mount
+  // Fetch the first page and the occupied slots on component mount
   useEffect(() => {
-    fetchEntries();
+    fetchEntries(null);
+    fetchOccupiedSlots();
   }, []);
 
-  const fetchEntries = async () => {
+  // One page of the table; the API pages newest first with X-Next-Cursor
+  const fetchEntries = async (cursor) => {
     try {
-      const response = await fetch(`${API_URL}/api/vehicle-entries`);
+      const params = new URLSearchParams({ limit: PAGE_SIZE });
+      if (cursor) {
+        params.set('cursor', cursor);
+      }
+      const response = await fetch(`${API_URL}/api/vehicle-entries?${params}`);
       const data = await response.json();
       setEntries(data);
+      setNextCursor(response.headers.get('X-Next-Cursor'));
       setLoading(false);
     } catch (err) {
       setError('Failed to fetch entries');
@@ -118,6 +129,33 @@ const VehicleEntry = ({ parkingStats }) => {
     }
   };
 
+  // Only Active entries hold a slot, and there are never more of them than slots
+  const fetchOccupiedSlots = async () => {
+    try {
+      const params = new URLSearchParams({ status: 'Active', limit: 500 });
+      const response = await fetch(`${API_URL}/api/vehicle-entries?${params}`);
+      const data = await response.json();
+      setOccupiedSlots(new Set(data.map(entry => entry.parkingSlot)));
+    } catch (err) {
+      setError('Failed to fetch occupied slots');
+    }
+  };
+
+  const showNextPage = () => {
+    if (nextCursor) {
+      setPageCursors([...pageCursors, nextCursor]);
+      fetchEntries(nextCursor);
+    }
+  };
+
+  const showPreviousPage = () => {
+    if (pageCursors.length > 1) {
+      const cursors = pageCursors.slice(0, -1);
+      setPageCursors(cursors);
+      fetchEntries(cursors[cursors.length - 1]);
+    }
+  };
+
   const handleSubmit = async (e) => {
     e.preventDefault();
 
@@ -151,7 +189,11 @@ const VehicleEntry = ({ parkingStats }) => {
       }
 
       const data = await response.json();
-      setEntries([data.entry, ...entries]);
+      // Newest first: it belongs at the top of the first page
+      if (pageCursors.length === 1) {
+        setEntries([data.entry, ...entries].slice(0, PAGE_SIZE));
+      }
+      fetchOccupiedSlots();
 
       handlePrintEntry(data.entry);
       // setTicketData(newTicket);
@@ -193,6 +235,7 @@ const VehicleEntry = ({ parkingStats }) => {
       }
 
       setEntries(entries.filter(entry => entry.id !== entryId));
+      fetchOccupiedSlots();
     } catch (err) {
       alert('Failed to delete entry: ' + err.message);
     }
@@ -217,6 +260,7 @@ const VehicleEntry = ({ parkingStats }) => {
           ? { ...entry, status: newStatus }
           : entry
       ));
+      fetchOccupiedSlots();
     } catch (err) {
       alert('Failed to update entry: ' + err.message);
     }
@@ -620,13 +664,21 @@ const VehicleEntry = ({ parkingStats }) => {
         {/* Pagination */}
         <div className="flex items-center justify-between mt-6">
           <p className="text-sm text-gray-500">
-            Showing 1 to {entries.length} of {entries.length} entries
+            Showing {entries.length ? (pageCursors.length - 1) * PAGE_SIZE + 1 : 0} to {(pageCursors.length - 1) * PAGE_SIZE + entries.length} entries
           </p>
           <div className="flex items-center gap-2">
-            <button className="px-3 py-1 border border-gray-200 rounded hover:bg-gray-50 dark:border-gray-700 dark:hover:bg-gray-800">
+            <button
+              onClick={showPreviousPage}
+              disabled={pageCursors.length === 1}
+              className="px-3 py-1 border border-gray-200 rounded hover:bg-gray-50 disabled:opacity-50 dark:border-gray-700 dark:hover:bg-gray-800"
+            >
               Previous
             </button>
-            <button className="px-3 py-1 border border-gray-200 rounded hover:bg-gray-50 dark:border-gray-700 dark:hover:bg-gray-800">
+            <button
+              onClick={showNextPage}
+              disabled={!nextCursor}
+              className="px-3 py-1 border border-gray-200 rounded hover:bg-gray-50 disabled:opacity-50 dark:border-gray-700 dark:hover:bg-gray-800"
+            >
               Next
             </button>
           </div>